@@ -0,0 +1,116 @@
+"""
+Compares the SQLite task store with the SDK's in-memory one on get/save
+throughput, for tasks saved the way streamed runs save them: once per
+status update, with the task's history growing each time.
+
+Each store gets `--tasks` tasks with `--updates` updates each, from
+`--concurrency` runs at a time, then a get of a random task, `--gets`
+times. The SQLite store writes to a fresh database in a temporary
+directory unless --path is given.
+
+Usage (from `a2a-agent/`):
+
+    uv run python benchmarks/task_store_benchmark.py [--tasks 1000] [--updates 20] [--concurrency 16] [--gets 20000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Message, Part, Role, Task, TaskState, TaskStatus, TextPart
+from a2a_agent.utils.task_store import SQLiteTaskStore
+
+
+def _message(task_id: str, index: int, event: str) -> Message:
+    return Message(
+        role=Role.agent,
+        message_id=f"{task_id}-{index}",
+        task_id=task_id,
+        parts=[Part(root=TextPart(text="Adding the nodes and edges " * 4))],
+        metadata={"event": event},
+    )
+
+
+async def _run(store: TaskStore, task_id: str, updates: int, latencies: List[float]):
+    task = Task(
+        id=task_id,
+        context_id=f"context-{task_id}",
+        status=TaskStatus(state=TaskState.submitted),
+        history=[Message(
+            role=Role.user,
+            message_id=f"{task_id}-request",
+            parts=[Part(root=TextPart(text="Generate a flowchart for order processing"))],
+        )],
+    )
+    for index in range(updates):
+        task.history.append(_message(task_id, index, "token"))
+        task.status = TaskStatus(state=TaskState.working)
+        started = time.perf_counter()
+        await store.save(task)
+        latencies.append(time.perf_counter() - started)
+        # Let the other runs go, as a streamed run does between updates
+        await asyncio.sleep(0)
+    task.status = TaskStatus(state=TaskState.completed)
+    started = time.perf_counter()
+    await store.save(task)
+    latencies.append(time.perf_counter() - started)
+
+
+def _report(label: str, operation: str, count: int, elapsed: float, latencies: List[float]):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<10} {operation:<5} {count / elapsed:>10.0f}/s  "
+          f"p50 {statistics.median(latencies) * 1e6:>8.1f}us  p95 {p95 * 1e6:>8.1f}us")
+
+
+async def _benchmark(label: str, store: TaskStore, tasks: int, updates: int, concurrency: int, gets: int):
+    task_ids = [f"task-{index}" for index in range(tasks)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def run(task_id: str):
+        async with semaphore:
+            await _run(store, task_id, updates, latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(task_id) for task_id in task_ids))
+    if isinstance(store, SQLiteTaskStore):
+        # Counts the buffered writes too
+        await store.flush()
+    _report(label, "save", len(latencies), time.perf_counter() - started, latencies)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(gets):
+        task_id = random.choice(task_ids)
+        get_started = time.perf_counter()
+        task = await store.get(task_id)
+        latencies.append(time.perf_counter() - get_started)
+        assert task is not None and task.status.state == TaskState.completed
+    _report(label, "get", gets, time.perf_counter() - started, latencies)
+
+
+async def main(tasks: int, updates: int, concurrency: int, gets: int, path: str):
+    await _benchmark("in-memory", InMemoryTaskStore(), tasks, updates, concurrency, gets)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = path or os.path.join(directory, "tasks.sqlite3")
+        store = SQLiteTaskStore(path, retention_seconds=3600, max_tasks=tasks)
+        await _benchmark("sqlite", store, tasks, updates, concurrency, gets)
+        print(f"\nsqlite: {store.stats}")
+        await store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=20, help="status updates per task")
+    parser.add_argument("--concurrency", type=int, default=16, help="runs saving at once")
+    parser.add_argument("--gets", type=int, default=20000)
+    parser.add_argument("--path", default="", help="SQLite database (default: a temporary one)")
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.updates, args.concurrency, args.gets, args.path))
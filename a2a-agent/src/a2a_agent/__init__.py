@@ -1,4 +1,5 @@
 import sys
+from contextlib import asynccontextmanager
 import click
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
@@ -9,10 +10,15 @@ from a2a.types import (
     AgentCard,
     AgentSkill,
 )
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 from a2a_agent.agent import MermaidAgent
 from a2a_agent.agent_executor import MermaidAgentExecutor
 from a2a_agent.utils.env import Env
 from a2a_agent.utils.logger import setup_logger
+from a2a_agent.utils.scheduler import ClientCallContextBuilder
+from a2a_agent.utils.task_store import SQLiteTaskStore
 
 _logger = setup_logger(__name__)
 
@@ -26,7 +32,7 @@ def main(host: str, port: int):
     """Starts the Mermaid Diagram Agent server."""
     try:
         capabilities = AgentCapabilities(
-            streaming=False,
+            streaming=True,
             push_notifications=False
         )
         skill = AgentSkill(
@@ -71,15 +77,49 @@ def main(host: str, port: int):
             skills=[skill],
         )
 
+        agent_executor = MermaidAgentExecutor()
+        task_store = SQLiteTaskStore(
+            env.TASK_STORE_PATH,
+            env.TASK_RETENTION_SECONDS,
+            env.TASK_STORE_MAX_TASKS,
+        ) if env.TASK_STORE_PATH else InMemoryTaskStore()
         request_handler = DefaultRequestHandler(
-            agent_executor=MermaidAgentExecutor(),
-            task_store=InMemoryTaskStore(),
+            agent_executor=agent_executor,
+            task_store=task_store,
         )
         server = A2AStarletteApplication(
-            agent_card=agent_card, http_handler=request_handler
+            agent_card=agent_card,
+            http_handler=request_handler,
+            context_builder=ClientCallContextBuilder(),
         )
+        app = server.build()
 
-        uvicorn.run(server.build(), host=host, port=port)
+        @asynccontextmanager
+        async def lifespan(app: Starlette):
+            try:
+                yield
+            finally:
+                # Writes the saves still buffered
+                if isinstance(task_store, SQLiteTaskStore):
+                    await task_store.close()
+
+        app.router.lifespan_context = lifespan
+
+        async def cancellation_stats(request: Request) -> JSONResponse:
+            return JSONResponse(agent_executor.cancellation_stats)
+
+        async def scheduler_stats(request: Request) -> JSONResponse:
+            return JSONResponse(agent_executor.scheduler.stats)
+
+        async def response_cache_stats(request: Request) -> JSONResponse:
+            cache = agent_executor.response_cache
+            return JSONResponse(cache.stats if cache is not None else {"enabled": False})
+
+        app.add_route("/stats/cancellations", cancellation_stats, methods=["GET"])
+        app.add_route("/stats/scheduler", scheduler_stats, methods=["GET"])
+        app.add_route("/stats/response-cache", response_cache_stats, methods=["GET"])
+
+        uvicorn.run(app, host=host, port=port)
     except Exception as e:
         _logger.error(f'An error occurred during server startup: {e}')
         sys.exit(1)
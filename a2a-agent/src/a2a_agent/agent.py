@@ -1,19 +1,32 @@
-from typing import List, Literal
-from langgraph.checkpoint.memory import MemorySaver
-from langchain.agents import create_agent
+import asyncio
+from functools import cache
+from uuid import uuid4
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Literal, NamedTuple, Optional
 from pydantic import BaseModel
-from a2a_agent.utils.llm_model import model
-from a2a_agent.utils.mcp_tools import mcp_client
+from a2a_agent.utils.llm_model import get_model
+from a2a_agent.utils.mcp_tools import get_mcp_client
 from a2a.types import Message
 from a2a.utils.message import get_message_text
-from langchain_core.runnables.config import RunnableConfig
+from a2a_agent.utils.env import Env
 from a2a_agent.utils.logger import setup_logger
-from langchain_core.tools.base import BaseTool
+from a2a_agent.utils.repair import REPAIR_FEEDBACK_NAME, mermaid_blocks, repair_feedback
+from a2a_agent.utils.response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    from langchain_core.runnables.config import RunnableConfig
+    from langchain_core.tools.base import BaseTool
+    from langgraph.checkpoint.base import BaseCheckpointSaver
 
 
 _logger = setup_logger(__name__)
+env = Env()
+
+
+@cache
+def get_memory() -> "BaseCheckpointSaver":
+    from a2a_agent.utils.checkpointer import SQLiteCheckpointer
 
-memory = MemorySaver()
+    return SQLiteCheckpointer(env.MEMORY_PATH, env.MEMORY_TTL_SECONDS, env.MEMORY_MAX_THREADS)
 
 
 class ResponseFormat(BaseModel):
@@ -23,12 +36,59 @@ class ResponseFormat(BaseModel):
     message: str
 
 
-def _log_tools(tools: List[BaseTool]):
+class AgentEvent(NamedTuple):
+    """One step of a streamed run, see `MermaidAgent.astream`."""
+
+    kind: Literal['token', 'tool_call', 'tool_result', 'diagram', 'completed', 'error']
+    content: str
+    metadata: Optional[Dict] = None
+
+
+# Progress shown while a tool runs
+_TOOL_PROGRESS = {
+    "search_mermaid_docs": "Searching the Mermaid docs",
+    "validate_mermaid_diagram": "Validating the diagram",
+    "render_mermaid_diagram": "Rendering the diagram",
+}
+
+
+def _log_tools(tools: List["BaseTool"]):
     _logger.debug(f"Tools found: {[tool.name for tool in tools]}")
 
 
+def _updated_messages(update: Any) -> List:
+    """Messages a node added, from an `updates` stream chunk."""
+    if not isinstance(update, dict):
+        return []
+    messages = update.get("messages") or []
+    return messages if isinstance(messages, list) else [messages]
+
+
+def mermaid_block(mermaid_code: str) -> str:
+    """A diagram as Markdown."""
+    return f"```mermaid\n{mermaid_code.strip()}\n```"
+
+
+def _validation_summary(result: Dict) -> str:
+    errors = result.get("errors") or []
+    if result["valid"]:
+        return "The diagram is valid"
+    return f"The diagram is invalid: {errors[0]}" if errors else "The diagram is invalid"
+
+
+def _structured_content(message: Any) -> Dict:
+    """The structured result of an MCP tool call, empty when it has none."""
+    artifact = getattr(message, "artifact", None)
+    content = artifact.get("structured_content") if isinstance(artifact, dict) else None
+    # FastMCP wraps results that aren't objects, like `-> Dict`, in {"result": ...}
+    if isinstance(content, dict) and set(content) == {"result"}:
+        content = content["result"]
+    return content if isinstance(content, dict) else {}
+
+
 class MermaidAgent:
 
+    # See `system_prompt` for the placeholders
     SYSTEM_INSTRUCTION = """
     You are a Mermaid Diagram Expert Agent.
 
@@ -36,8 +96,7 @@ class MermaidAgent:
     embedded in Markdown responses.
 
     You have access to the following tools:
-    - search_mermaid_docs
-    - validate_mermaid_diagram
+    - search_mermaid_docs{validate_tool}
     - render_mermaid_diagram
 
     -------------------------
@@ -66,14 +125,7 @@ class MermaidAgent:
 
     Do NOT use this tool for trivial diagrams unless unsure.
 
-    ### validate_mermaid_diagram
-    Use this tool AFTER generating Mermaid syntax and BEFORE returning it.
-    If validation fails:
-    - Fix the syntax
-    - Re-validate
-    - Repeat until valid or until further correction is impossible
-
-    Validation is advisory but preferred.
+    {validation_policy}
 
     ### render_mermaid_diagram
     Use this tool ONLY when:
@@ -122,26 +174,207 @@ class MermaidAgent:
     You are precise, cautious, and professional.
     """
 
+    VALIDATION_BY_TOOL = """### validate_mermaid_diagram
+    Use this tool AFTER generating Mermaid syntax and BEFORE returning it.
+    If validation fails:
+    - Fix the syntax
+    - Re-validate
+    - Repeat until valid or until further correction is impossible
+
+    Validation is advisory but preferred."""
+
+    VALIDATION_IN_GRAPH = """### Diagram validation
+    Every Mermaid diagram in your final answer is validated automatically.
+    If one is invalid you get the error back: fix the diagram and reply
+    with the complete corrected answer."""
+
     def __init__(self):
-        self._model = model
         self._graph = None
+        self._tools: List["BaseTool"] = []
+        # Validates the model's diagrams in the graph, see `_check_answer`
+        self._validator: Optional["BaseTool"] = None
+        self.system_prompt = self.SYSTEM_INSTRUCTION.format(
+            validate_tool="\n    - validate_mermaid_diagram",
+            validation_policy=self.VALIDATION_BY_TOOL,
+        )
+        self._init_lock = asyncio.Lock()
+
+    def _create_graph(self, tools: List["BaseTool"]):
+        from langchain.agents import create_agent
+        from langchain.agents.middleware import after_model, before_model
+        from langchain_core.messages import RemoveMessage
+        from langgraph.graph.message import REMOVE_ALL_MESSAGES
+        from a2a_agent.utils.history import compact_history
+
+        @before_model
+        def compact(state, runtime):
+            # Rewrites the stored history too, so it stays bounded across turns
+            messages = compact_history(state["messages"], env.MEMORY_MAX_TOKENS)
+            if messages is None:
+                return None
+            return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *messages]}
+
+        middleware = [compact]
+        if self._validator is not None:
+            @after_model(can_jump_to=["model"])
+            async def validate_and_repair(state, runtime):
+                return await self._check_answer(state)
+
+            middleware.append(validate_and_repair)
+
+        return create_agent(
+            model=get_model(),
+            tools=tools,
+            checkpointer=get_memory(),
+            system_prompt=self.system_prompt,
+            middleware=middleware,
+        )
 
     async def _init(self):
+        # The first request imports langchain, which is kept off the event loop
+        mcp_client = await asyncio.to_thread(get_mcp_client)
         tools = await mcp_client.get_tools()
         _log_tools(tools)
-        self._graph = create_agent(
-            model=self._model,
-            tools=tools,
-            checkpointer=memory,
-            system_prompt=self.SYSTEM_INSTRUCTION,
+        if env.REPAIR_MAX_ITERATIONS > 0:
+            self._validator = next((tool for tool in tools if tool.name == "validate_mermaid_diagram"), None)
+        if self._validator is not None:
+            # The model no longer spends a call on every validation
+            tools = [tool for tool in tools if tool is not self._validator]
+            self.system_prompt = self.SYSTEM_INSTRUCTION.format(
+                validate_tool="",
+                validation_policy=self.VALIDATION_IN_GRAPH,
+            )
+        self._graph = await asyncio.to_thread(self._create_graph, tools)
+        self._tools = tools
+
+    async def _validate(self, mermaid_code: str) -> Dict:
+        """Validates a diagram with the MCP tool, empty when it couldn't be."""
+        try:
+            message = await self._validator.ainvoke({
+                "type": "tool_call",
+                "name": self._validator.name,
+                "args": {"mermaid_code": mermaid_code},
+                "id": f"validate-{uuid4()}",
+            })
+        except Exception as e:
+            _logger.warning(f"Diagram validation failed: {e}")
+            return {}
+        return _structured_content(message)
+
+    async def _check_answer(self, state: Dict) -> Optional[Dict]:
+        """
+        Validates the diagrams in the model's final answer, and while the
+        REPAIR_MAX_ITERATIONS budget lasts sends the model back with the
+        first error. Progress and metrics go to the `custom` stream.
+        """
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        from langchain_core.messages.utils import count_tokens_approximately
+        from langgraph.config import get_stream_writer
+
+        answer = state["messages"][-1]
+        if answer.type != "ai" or answer.tool_calls:
+            return None
+        blocks = mermaid_blocks(answer.text)
+        if not blocks:
+            return None
+
+        write = get_stream_writer()
+        repairs = 0
+        for message in reversed(state["messages"]):
+            if message.type == "human":
+                if message.name != REPAIR_FEEDBACK_NAME:
+                    break
+                repairs += 1
+        # Estimate of the model call the tool loop spends per validation: the
+        # history so far, and the diagram again as the tool call's arguments
+        prompt_tokens = count_tokens_approximately([SystemMessage(self.system_prompt), *state["messages"]])
+
+        for code in blocks:
+            write(("event", AgentEvent(
+                "tool_call",
+                _TOOL_PROGRESS[self._validator.name],
+                {"tool": self._validator.name, "args": {"mermaid_code": code}},
+            )))
+            result = await self._validate(code)
+            if "valid" not in result:
+                write(("event", AgentEvent(
+                    "tool_result",
+                    f"{self._validator.name} failed",
+                    {"tool": self._validator.name, "status": "error"},
+                )))
+                continue
+            write(("metrics", {
+                "validations": 1,
+                "tokens_saved": prompt_tokens + count_tokens_approximately([AIMessage(code)]),
+            }))
+            errors = result.get("errors") or []
+            write(("event", AgentEvent(
+                "tool_result", _validation_summary(result), {"tool": self._validator.name, "valid": result["valid"]})))
+            if result["valid"]:
+                write(("event", AgentEvent("diagram", mermaid_block(code), {"mermaid_code": code})))
+                continue
+            if repairs >= env.REPAIR_MAX_ITERATIONS:
+                _logger.warning(f"Diagram still invalid after {repairs} repairs: {errors[:1]}")
+                continue
+            write(("metrics", {"repairs": 1}))
+            return {
+                "messages": [HumanMessage(repair_feedback(code, errors), name=REPAIR_FEEDBACK_NAME)],
+                "jump_to": "model",
+            }
+        return None
+
+    async def _ensure_init(self):
+        if self._graph is None:
+            # Concurrent first requests would each build the graph
+            async with self._init_lock:
+                if self._graph is None:
+                    await self._init()
+
+    async def response_key(self, input: Message) -> str:
+        """
+        Identifies a request to a `ResponseCache`: the same message to the
+        same model, instructions and tools gets the same answer.
+        """
+        await self._ensure_init()
+        tools = [
+            {"name": tool.name, "description": tool.description, "args": tool.args}
+            for tool in self._tools
+        ]
+        return ResponseCache.key(get_message_text(input), env.LLM_MODEL, self.system_prompt, tools)
+
+    async def has_history(self, config: "RunnableConfig") -> bool:
+        """Whether the conversation has earlier messages, which answers depend on."""
+        return await get_memory().aget_tuple(config) is not None
+
+    async def remember(self, input: Message, response: str, config: "RunnableConfig"):
+        """Adds a request answered without a run to the conversation, for follow-ups."""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        await self._ensure_init()
+        await self._graph.aupdate_state(
+            config,
+            {"messages": [HumanMessage(get_message_text(input)), AIMessage(response)]},
+            as_node="model",
         )
 
-    async def ainvoke(self, input: Message, config: RunnableConfig) -> ResponseFormat:
+    async def astream(self, input: Message, config: "RunnableConfig") -> AsyncIterator[AgentEvent]:
+        """
+        Runs the agent and yields its progress as it happens: the model's text
+        as it's generated, tool calls and their results, every diagram as soon
+        as it validates, and finally the complete response or the error.
+
+        The completed event's metadata has the run's model calls, and the
+        model calls and (approximate) tokens that validating in the graph
+        saved compared with validating through tool calls.
+        """
         try:
-            if self._graph is None:
-                await self._init()
+            await self._ensure_init()
             message = get_message_text(input)
-            result = await self._graph.ainvoke(
+            tool_calls: Dict[str, Dict] = {}
+            final_message = None
+            diagrams = set()
+            metrics = {"llm_calls": 0, "validations": 0, "repairs": 0, "tokens_saved": 0}
+            async for mode, chunk in self._graph.astream(
                 {
                     "messages": [
                         {
@@ -150,19 +383,77 @@ class MermaidAgent:
                         }
                     ]
                 },
-                config=config
-            )
-            final_message = result["messages"][-1]
-            return ResponseFormat(
-                status="completed",
-                message=final_message.content if hasattr(
-                    final_message, 'content') else str(final_message)
+                config=config,
+                # Tokens as the model generates them, every node's messages once
+                # it's done, and the in-graph validation's progress
+                stream_mode=["messages", "updates", "custom"],
+            ):
+                if mode == "messages":
+                    token, _ = chunk
+                    # Tool results are streamed too, they're reported from the updates
+                    if token.type == "AIMessageChunk" and token.text:
+                        yield AgentEvent("token", token.text)
+                    continue
+                if mode == "custom":
+                    kind, value = chunk
+                    if kind == "metrics":
+                        for key, count in value.items():
+                            metrics[key] += count
+                    elif value.kind != "diagram" or value.content not in diagrams:
+                        # A repaired answer repeats the diagrams that were valid
+                        diagrams.add(value.content)
+                        yield value
+                    continue
+                if "model" in chunk:
+                    metrics["llm_calls"] += 1
+                for update in chunk.values():
+                    for node_message in _updated_messages(update):
+                        if node_message.type == "ai":
+                            final_message = node_message
+                            for call in node_message.tool_calls:
+                                tool_calls[call["id"]] = call
+                                yield AgentEvent(
+                                    "tool_call",
+                                    _TOOL_PROGRESS.get(call["name"], f"Calling {call['name']}"),
+                                    {"tool": call["name"], "args": call["args"]},
+                                )
+                        elif node_message.type == "tool":
+                            for event in self._tool_events(node_message, tool_calls.get(node_message.tool_call_id)):
+                                yield event
+            yield AgentEvent(
+                "completed",
+                final_message.text if final_message is not None else "",
+                {"metrics": metrics | {"llm_calls_saved": metrics["validations"]}},
             )
         except Exception as e:
             _logger.error(str(e))
-            return ResponseFormat(
-                status="error",
-                message=str(e)
-            )
+            yield AgentEvent("error", str(e))
+
+    @staticmethod
+    def _tool_events(message: Any, call: Optional[Dict]) -> List[AgentEvent]:
+        result = _structured_content(message)
+        code = (call or {}).get("args", {}).get("mermaid_code")
+        if message.name == "validate_mermaid_diagram" and "valid" in result:
+            events = [AgentEvent(
+                "tool_result", _validation_summary(result), {"tool": message.name, "valid": result["valid"]})]
+            # The model may still reword its answer, but this diagram is final
+            if result["valid"] and code:
+                events.append(AgentEvent("diagram", mermaid_block(code), {"mermaid_code": code}))
+            return events
+        failed = message.status == "error" or result.get("success") is False
+        return [AgentEvent(
+            "tool_result",
+            f"{message.name} {'failed' if failed else 'finished'}",
+            {"tool": message.name, "status": "error" if failed else "success"},
+        )]
+
+    async def ainvoke(self, input: Message, config: "RunnableConfig") -> ResponseFormat:
+        async for event in self.astream(input, config):
+            if event.kind in ("completed", "error"):
+                return ResponseFormat(
+                    status="completed" if event.kind == "completed" else "error",
+                    message=event.content
+                )
+        return ResponseFormat(status="error", message="The agent stopped without a response")
 
     SUPPORTED_CONTENT_TYPES = ['text']
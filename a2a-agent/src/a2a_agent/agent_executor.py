@@ -1,17 +1,42 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
+    Message,
+    Part,
+    Task,
+    TaskNotCancelableError,
     TaskState,
-    UnsupportedOperationError,
+    TextPart,
 )
 from a2a.utils import (
-    new_agent_text_message,
     new_task,
 )
 from a2a.utils.errors import ServerError
-from a2a_agent.agent import MermaidAgent
-from uuid import uuid4
+from a2a_agent.agent import AgentEvent, MermaidAgent, mermaid_block
+from a2a_agent.utils.env import Env
+from a2a_agent.utils.logger import setup_logger
+from a2a_agent.utils.repair import mermaid_blocks
+from a2a_agent.utils.response_cache import CachedResponse, ResponseCache
+from a2a_agent.utils.scheduler import RunScheduler, SchedulerBusyError
+
+_logger = setup_logger(__name__)
+
+env = Env()
+
+
+def _client_id(context: RequestContext) -> str:
+    """Who runs are queued by: the user when authenticated, else their address."""
+    call_context = context.call_context
+    if call_context is not None:
+        if call_context.user.is_authenticated:
+            return call_context.user.user_name
+        if client := call_context.state.get("client"):
+            return client
+    return context.context_id or ""
 
 
 class MermaidAgentExecutor(AgentExecutor):
@@ -19,6 +44,20 @@ class MermaidAgentExecutor(AgentExecutor):
 
     def __init__(self):
         self._agent = MermaidAgent()
+        # Running agent per A2A task id
+        self._runs: Dict[str, asyncio.Task] = {}
+        # Task ids `cancel` was asked to stop, told apart from a server
+        # shutdown or a client going away cancelling the run
+        self._cancelling: Set[str] = set()
+        self.scheduler = RunScheduler(env.MAX_CONCURRENT_RUNS, env.MAX_QUEUED_RUNS)
+        self.response_cache = ResponseCache(
+            env.RESPONSE_CACHE_MAX_ENTRIES,
+            env.RESPONSE_CACHE_TTL_SECONDS,
+            env.RESPONSE_CACHE_PATH or None,
+        ) if env.RESPONSE_CACHE else None
+        # Work stopped by cancellation: runs, and the model or tool calls
+        # they were waiting on, and runs that were still queued
+        self.cancellation_stats = {"runs": 0, "model_calls": 0, "tool_calls": 0, "queued": 0}
 
     async def execute(
         self,
@@ -30,24 +69,193 @@ class MermaidAgentExecutor(AgentExecutor):
             task = new_task(context.message)
             await event_queue.enqueue_event(task)
         updater = TaskUpdater(event_queue, task.id, task.context_id)
-        result = await self._agent.ainvoke(
-            context.message,
-            {
-                'configurable': {
-                    'thread_id': f"{str(uuid4())}"
-                }
+
+        # Runs separately so `cancel` can stop it and wait for it to unwind
+        run = asyncio.create_task(
+            self._run(context.message, task, updater, _client_id(context)))
+        self._runs[task.id] = run
+        try:
+            await run
+        finally:
+            self._runs.pop(task.id, None)
+            self._cancelling.discard(task.id)
+
+    async def _run(self, message: Message, task: Task, updater: TaskUpdater, client: str):
+        # Messages of the same A2A context continue the same conversation
+        config = {
+            'configurable': {
+                'thread_id': task.context_id
             }
+        }
+        cache_key = await self._cache_key(message, config)
+        if cache_key is not None and (cached := await self.response_cache.aget(cache_key)) is not None:
+            await self._replay(message, cached, updater, config)
+            return
+        try:
+            # The task stays submitted while it waits for a slot, cancelling
+            # it from then on is handled by `_stream`
+            async with self.scheduler.slot(client):
+                await self._stream(message, task, updater, config, cache_key)
+        except SchedulerBusyError as e:
+            _logger.warning(f"Rejected task {task.id}: {e}")
+            await updater.reject(
+                updater.new_agent_message(
+                    [Part(root=TextPart(text=str(e)))],
+                    metadata={"retry_after": e.retry_after},
+                )
+            )
+        except asyncio.CancelledError:
+            # Cancelled before it got a slot
+            if not self._cancelled_by_request(task.id):
+                raise
+            self.cancellation_stats["queued"] += 1
+            _logger.info(f"Cancelled task {task.id} while queued")
+            await updater.cancel()
+
+    def _cancelled_by_request(self, task_id: str) -> bool:
+        """
+        Whether the current run was cancelled through `cancel`, in which case
+        it's uncancelled to report it. Any other cancellation is not ours to
+        swallow.
+        """
+        if task_id not in self._cancelling:
+            return False
+        asyncio.current_task().uncancel()
+        return True
+
+    async def _cache_key(self, message: Message, config: Dict) -> Optional[str]:
+        """The response cache key, None when the cache is off or doesn't apply."""
+        if self.response_cache is None:
+            return None
+        try:
+            # Follow-ups depend on the conversation so far
+            if await self._agent.has_history(config):
+                return None
+            return await self._agent.response_key(message)
+        except Exception as e:
+            _logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    async def _replay(self, message: Message, cached: CachedResponse, updater: TaskUpdater, config: Dict):
+        """Answers from the response cache, without running the agent."""
+        await updater.start_work()
+        for code in cached.diagrams:
+            await updater.add_artifact(
+                [Part(root=TextPart(text=mermaid_block(code)))],
+                name="diagram",
+                metadata={"mermaid_code": code, "cached": True},
+            )
+        try:
+            await self._agent.remember(message, cached.message, config)
+        except Exception as e:
+            _logger.warning(f"Failed to add a cached answer to the conversation: {e}")
+        await updater.update_status(
+            TaskState.completed,
+            updater.new_agent_message(
+                [Part(root=TextPart(text=cached.message))],
+                metadata={"cached": True},
+            ),
         )
+
+    async def _stream(
+        self,
+        message: Message,
+        task: Task,
+        updater: TaskUpdater,
+        config: Dict,
+        cache_key: Optional[str],
+    ):
+        # Tokens are batched into one update per STREAM_FLUSH_INTERVAL, the
+        # first one is sent right away
+        pending: List[str] = []
+        flushed_at = 0.0
+        # Tool calls started and not finished yet
+        tools_running = 0
+        # Code of the diagrams that validated
+        diagrams: List[str] = []
+
+        async def flush():
+            nonlocal flushed_at
+            if pending:
+                await self._working(updater, AgentEvent("token", "".join(pending)))
+                pending.clear()
+            flushed_at = time.monotonic()
+
+        try:
+            await updater.start_work()
+            async for event in self._agent.astream(message, config):
+                if event.kind == "token":
+                    pending.append(event.content)
+                    if time.monotonic() - flushed_at >= env.STREAM_FLUSH_INTERVAL:
+                        await flush()
+                    continue
+                await flush()
+                if event.kind == "tool_call":
+                    tools_running += 1
+                elif event.kind == "tool_result":
+                    tools_running -= 1
+                if event.kind == "diagram":
+                    diagrams.append(event.metadata["mermaid_code"])
+                    await updater.add_artifact(
+                        [Part(root=TextPart(text=event.content))],
+                        name="diagram",
+                        metadata=event.metadata,
+                    )
+                elif event.kind in ("completed", "error"):
+                    if event.kind == "completed" and cache_key is not None and self._validated(event.content, diagrams):
+                        await self.response_cache.aput(cache_key, CachedResponse(event.content, diagrams))
+                    await updater.update_status(
+                        TaskState.completed if event.kind == "completed" else TaskState.failed,
+                        updater.new_agent_message(
+                            [Part(root=TextPart(text=event.content))],
+                            metadata=event.metadata,
+                        )
+                    )
+                else:
+                    await self._working(updater, event)
+        except asyncio.CancelledError:
+            # Aborting the run closes the MCP sessions of its tool calls,
+            # which cancels them on the server and kills their renderers
+            if not self._cancelled_by_request(task.id):
+                raise
+            self.cancellation_stats["runs"] += 1
+            # The agent alternates between the model and its tools
+            if tools_running > 0:
+                self.cancellation_stats["tool_calls"] += tools_running
+            else:
+                self.cancellation_stats["model_calls"] += 1
+            _logger.info(f"Cancelled task {task.id}")
+            await updater.cancel()
+
+    @staticmethod
+    def _validated(answer: str, diagrams: List[str]) -> bool:
+        """
+        Whether every diagram in the answer validated during the run, the
+        only answers reused. A diagram left invalid once the repair budget
+        ran out, or never validated at all, isn't.
+        """
+        blocks = mermaid_blocks(answer)
+        validated = {code.strip() for code in diagrams}
+        return bool(blocks) and all(code in validated for code in blocks)
+
+    @staticmethod
+    async def _working(updater: TaskUpdater, event: AgentEvent):
+        """Sends a step of the run, its kind and details in the message metadata."""
         await updater.update_status(
-            TaskState.completed if result.status == "completed" else TaskState.failed,
-            new_agent_text_message(
-                result.message,
-                task.context_id,
-                task.id,
-            )
+            TaskState.working,
+            updater.new_agent_message(
+                [Part(root=TextPart(text=event.content))],
+                metadata={"event": event.kind} | (event.metadata or {}),
+            ),
         )
 
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raise ServerError(error=UnsupportedOperationError())
+        run = self._runs.get(context.task_id)
+        if run is None or run.done():
+            raise ServerError(error=TaskNotCancelableError())
+        # The run reports the cancellation itself, to every subscriber
+        self._cancelling.add(context.task_id)
+        run.cancel()
+        await asyncio.wait([run])
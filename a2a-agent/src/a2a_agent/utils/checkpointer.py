@@ -0,0 +1,362 @@
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from a2a_agent.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpoints in a local SQLite database, one thread per A2A
+    conversation, so follow-up messages continue where the last one left off
+    and survive restarts.
+
+    Storage stays bounded: only the latest `keep_checkpoints` checkpoints of
+    a thread are kept, since a conversation only ever resumes from its latest
+    one, threads idle for longer than `ttl_seconds` are deleted, and beyond
+    `max_threads` the least recently used ones are.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_threads: int,
+        keep_checkpoints: int = 2,
+        evict_interval: float = 60,
+    ):
+        super().__init__()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._ttl_seconds = ttl_seconds
+        self._max_threads = max_threads
+        self._keep_checkpoints = keep_checkpoints
+        self._evict_interval = evict_interval
+        self._evicted_at = 0.0
+        # Used from worker threads by the async methods, hence the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_id TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    type TEXT,
+                    checkpoint BLOB,
+                    metadata BLOB,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                );
+                CREATE TABLE IF NOT EXISTS writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    type TEXT,
+                    value BLOB,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                );
+                """
+            )
+
+    @property
+    def stats(self) -> Dict:
+        with self._lock:
+            threads, checkpoints, writes = self._connection.execute(
+                "SELECT (SELECT count(*) FROM threads), (SELECT count(*) FROM checkpoints),"
+                " (SELECT count(*) FROM writes)"
+            ).fetchone()
+        return {"threads": threads, "checkpoints": checkpoints, "writes": writes}
+
+    def _tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: Tuple,
+        writes: List[Tuple],
+    ) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata = row
+        return CheckpointTuple(
+            {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            self.serde.loads_typed((type_, checkpoint)),
+            json.loads(metadata) if metadata is not None else {},
+            {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_checkpoint_id,
+                }
+            } if parent_checkpoint_id else None,
+            [
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def _writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple]:
+        return self._connection.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata FROM checkpoints"
+            " WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: List[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            # Checkpoint ids sort in creation order
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+            if row is None:
+                return None
+            writes = self._writes(thread_id, checkpoint_ns, row[0])
+        return self._tuple(thread_id, checkpoint_ns, row, writes)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions, params = [], []
+        if config is not None:
+            conditions.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata"
+                f" FROM checkpoints{where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+            rows = [(row, self._writes(row[0], row[1], row[2])) for row in rows]
+        returned = 0
+        for (thread_id, checkpoint_ns, *row), writes in rows:
+            found = self._tuple(thread_id, checkpoint_ns, tuple(row), writes)
+            if filter and any(found.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield found
+            returned += 1
+            if limit and returned >= limit:
+                return
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = json.dumps(
+            get_checkpoint_metadata(config, metadata), ensure_ascii=False, default=str
+        ).encode("utf-8", "ignore")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints"
+                " (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized,
+                    serialized_metadata,
+                ),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+            self._prune(thread_id, checkpoint_ns)
+        self._maybe_evict()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        # Special channels (errors, interrupts...) replace earlier writes
+        verb = "REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "IGNORE"
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT OR {verb} INTO writes"
+                " (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(config["configurable"]["thread_id"]),
+                        config["configurable"].get("checkpoint_ns", ""),
+                        str(config["configurable"]["checkpoint_id"]),
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, index),
+                        channel,
+                        *self.serde.dumps_typed(value),
+                    )
+                    for index, (channel, value) in enumerate(writes)
+                ],
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._connection:
+            self._delete_threads([str(thread_id)])
+
+    def _delete_threads(self, thread_ids: List[str]):
+        for table in ("checkpoints", "writes", "threads"):
+            self._connection.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,) for thread_id in thread_ids])
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Deletes all but the latest checkpoints of a thread, with their writes."""
+        stale = self._connection.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self._keep_checkpoints),
+        ).fetchall()
+        for table in ("checkpoints", "writes"):
+            self._connection.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id, in stale],
+            )
+
+    def _maybe_evict(self):
+        now = time.monotonic()
+        if now - self._evicted_at < self._evict_interval:
+            return
+        self._evicted_at = now
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes expired and least recently used threads, returns how many."""
+        with self._lock, self._connection:
+            expired = self._connection.execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?",
+                (time.time() - self._ttl_seconds,),
+            ).fetchall()
+            excess = self._connection.execute(
+                "SELECT thread_id FROM threads WHERE updated_at >= ?"
+                " ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                (time.time() - self._ttl_seconds, self._max_threads),
+            ).fetchall()
+            thread_ids = [thread_id for thread_id, in expired + excess]
+            self._delete_threads(thread_ids)
+        if thread_ids:
+            _logger.info(f"Evicted {len(thread_ids)} conversations from memory")
+        return len(thread_ids)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        found = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in found:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Monotonic string versions, like LangGraph's own savers."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
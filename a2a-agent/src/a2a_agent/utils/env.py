@@ -8,6 +8,43 @@ class Env(BaseSettings):
     LLM_MODEL: str
     MERMAID_MCP_SERVER_URL: str
 
+    # Streamed text is sent at most this often (seconds), tokens in between are batched
+    STREAM_FLUSH_INTERVAL: float = 0.1
+
+    # Agent runs going at once, they all share the model
+    MAX_CONCURRENT_RUNS: int = 2
+    # Runs waiting for a slot, more are rejected with a retry hint
+    MAX_QUEUED_RUNS: int = 32
+
+    # Diagrams in the model's answer are validated in the graph and sent back
+    # with their errors at most this many times per message. 0 leaves
+    # validation to the model's own tool calls.
+    REPAIR_MAX_ITERATIONS: int = 2
+
+    # Answers to repeated requests are reused, opt-in as it suits models at
+    # temperature 0. Only a conversation's first message is answered from it.
+    RESPONSE_CACHE: bool = False
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+    # SQLite database keeping cached answers across restarts, empty for memory only
+    RESPONSE_CACHE_PATH: str = ""
+
+    # A2A tasks are kept in this SQLite database, empty to keep them in memory only
+    TASK_STORE_PATH: str = ".cache/tasks.sqlite3"
+    # Finished tasks are deleted this long (seconds) after they finished
+    TASK_RETENTION_SECONDS: float = 7 * 24 * 60 * 60
+    # Beyond this many finished tasks the oldest are deleted
+    TASK_STORE_MAX_TASKS: int = 10000
+
+    # Conversations, one per A2A context, are kept in this SQLite database
+    MEMORY_PATH: str = ".cache/memory.sqlite3"
+    # Conversations idle for longer than this (seconds) are forgotten
+    MEMORY_TTL_SECONDS: float = 24 * 60 * 60
+    # Beyond this many conversations the least recently used are forgotten
+    MEMORY_MAX_THREADS: int = 1000
+    # History sent to the model, in approximate tokens, older turns are compacted to fit
+    MEMORY_MAX_TOKENS: int = 8000
+
     model_config = SettingsConfigDict(
         env_file=".env"
     )
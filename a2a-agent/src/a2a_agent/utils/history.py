@@ -0,0 +1,47 @@
+from typing import List, Optional
+from langchain_core.messages import AnyMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from a2a_agent.utils.repair import REPAIR_FEEDBACK_NAME
+
+
+def _is_question(message: AnyMessage) -> bool:
+    """A user's message, not the validator's feedback."""
+    return message.type == "human" and message.name != REPAIR_FEEDBACK_NAME
+
+
+def _turns(messages: List[AnyMessage]) -> List[List[AnyMessage]]:
+    """Splits a conversation into turns, each starting with a user message."""
+    turns: List[List[AnyMessage]] = []
+    for message in messages:
+        if _is_question(message) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _summarize_turn(turn: List[AnyMessage]) -> List[AnyMessage]:
+    """
+    Keeps the question and the final answer of a finished turn, not the tool
+    calls and repairs in between.
+    """
+    answers = [message for message in turn if message.type == "ai" and not message.tool_calls]
+    return [message for message in turn if _is_question(message)] + answers[-1:]
+
+
+def compact_history(messages: List[AnyMessage], max_tokens: int) -> Optional[List[AnyMessage]]:
+    """
+    Bounds the history sent to the model. Earlier turns are cut down to the
+    question and the answer, their search results and validation rounds
+    being of no use anymore, and the oldest turns are dropped until the
+    history fits in `max_tokens`. The current turn is always kept whole.
+
+    Returns None when the history needs no compaction.
+    """
+    turns = _turns(messages)
+    earlier = [_summarize_turn(turn) for turn in turns[:-1]]
+    current = turns[-1] if turns else []
+    budget = max_tokens - count_tokens_approximately(current)
+    while earlier and count_tokens_approximately([m for turn in earlier for m in turn]) > budget:
+        earlier.pop(0)
+    compacted = [message for turn in earlier for message in turn] + current
+    return compacted if len(compacted) < len(messages) else None
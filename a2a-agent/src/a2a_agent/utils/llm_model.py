@@ -1,10 +1,20 @@
-from langchain_ollama import ChatOllama
+from functools import cache
+from typing import TYPE_CHECKING
 
 from a2a_agent.utils.env import Env
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
 env = Env()
 
-model = ChatOllama(
-    model=env.LLM_MODEL,
-    temperature=0,
-)
+
+@cache
+def get_model() -> "BaseChatModel":
+    """The Ollama chat model, created (and langchain_ollama imported) on first use."""
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model=env.LLM_MODEL,
+        temperature=0,
+    )
@@ -1,11 +1,20 @@
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from functools import cache
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
 
-mcp_client = MultiServerMCPClient(
-    {
-        "mermaid": {
-            "transport": "http",
-            "url": "http://127.0.0.1:4000/mcp",
+
+@cache
+def get_mcp_client() -> "MultiServerMCPClient":
+    """The Mermaid MCP server's client, created on first use."""
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    return MultiServerMCPClient(
+        {
+            "mermaid": {
+                "transport": "http",
+                "url": "http://127.0.0.1:4000/mcp",
+            }
         }
-    }
-)
+    )
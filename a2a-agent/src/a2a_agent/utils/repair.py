@@ -0,0 +1,30 @@
+import re
+from typing import List
+
+# Name of the user messages the in-graph validator sends the model back with
+REPAIR_FEEDBACK_NAME = "mermaid_validator"
+
+_MERMAID_BLOCK = re.compile(r"```mermaid[ \t]*\r?\n(.*?)```", re.DOTALL)
+_ERROR_LINE = re.compile(r"\bline (\d+)", re.IGNORECASE)
+
+
+def mermaid_blocks(text: str) -> List[str]:
+    """The code of the fenced mermaid blocks in a Markdown answer."""
+    return [block.strip() for block in _MERMAID_BLOCK.findall(text) if block.strip()]
+
+
+def repair_feedback(mermaid_code: str, errors: List[str], max_chars: int = 600) -> str:
+    """
+    What the model is sent back with for an invalid diagram: the first
+    error and the line it points at, rather than the whole validation
+    result.
+    """
+    error = (errors[0] if errors else "").strip() or "The diagram is invalid"
+    feedback = ["The Mermaid diagram in your answer failed validation:", error[:max_chars]]
+    if match := _ERROR_LINE.search(error):
+        number = int(match.group(1))
+        lines = mermaid_code.splitlines()
+        if 1 <= number <= len(lines):
+            feedback.append(f"Line {number}: {lines[number - 1].strip()}")
+    feedback.append("Fix the diagram and reply with the complete corrected answer.")
+    return "\n".join(feedback)
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class CachedResponse(NamedTuple):
+    # The final Markdown answer
+    message: str
+    # Mermaid code of the diagrams that validated during the run
+    diagrams: List[str]
+
+
+def normalize_message(message: str) -> str:
+    """Normalizes Unicode forms and whitespace, which don't change what's asked."""
+    return " ".join(unicodedata.normalize("NFKC", message).split())
+
+
+class ResponseCache:
+    """
+    Agent responses by request, for a model that answers the same request
+    the same way. Entries expire `ttl_seconds` after they're stored and at
+    most `max_entries` are kept, least recently used first out. When `path`
+    is set they're also kept in a SQLite database there, so they survive
+    restarts; `aget` and `aput` read and write it in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400, path: Optional[str] = None):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        # Key -> (expires at, response), expiry in wall clock time so it carries over restarts
+        self._entries: OrderedDict[str, Tuple[float, CachedResponse]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._connection = None
+        self._lock = threading.Lock()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._connection:
+                self._connection.executescript(
+                    """
+                    PRAGMA journal_mode=WAL;
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        used_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+                    """
+                )
+                self._connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    @staticmethod
+    def key(message: str, model: str, system_prompt: str, tools: List[Dict]) -> str:
+        digest = hashlib.sha256()
+        for part in (
+            normalize_message(message),
+            model,
+            hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+            hashlib.sha256(json.dumps(tools, sort_keys=True, default=str).encode("utf-8")).hexdigest(),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @property
+    def stats(self) -> Dict:
+        stats = {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+        }
+        if self._connection is not None:
+            with self._lock:
+                stats["disk_entries"] = self._connection.execute(
+                    "SELECT count(*) FROM responses").fetchone()[0]
+        return stats
+
+    async def aget(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None and self._connection is not None:
+            entry = await asyncio.to_thread(self._read, key)
+        if entry is not None and entry[0] > time.time():
+            self._remember(key, entry)
+            self._hits += 1
+            if self._connection is not None:
+                await asyncio.to_thread(self._touch, key)
+            return entry[1]
+        self._entries.pop(key, None)
+        self._misses += 1
+        if entry is not None and self._connection is not None:
+            # Expired
+            await asyncio.to_thread(self._delete, key)
+        return None
+
+    async def aput(self, key: str, response: CachedResponse):
+        if self._max_entries <= 0:
+            return
+        entry = (time.time() + self._ttl_seconds, response)
+        self._remember(key, entry)
+        if self._connection is not None:
+            await asyncio.to_thread(self._write, key, entry)
+
+    def _remember(self, key: str, entry: Tuple[float, CachedResponse]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _write(self, key: str, entry: Tuple[float, CachedResponse]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry[1]._asdict()), entry[0], time.time()),
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+
+    def _read(self, key: str) -> Optional[Tuple[float, CachedResponse]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[1], CachedResponse(**json.loads(row[0]))
+
+    def _touch(self, key: str):
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+
+    def _delete(self, key: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
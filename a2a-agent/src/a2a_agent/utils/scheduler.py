@@ -0,0 +1,140 @@
+import asyncio
+import math
+import statistics
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+from a2a.server.apps.jsonrpc import DefaultCallContextBuilder
+from a2a.server.context import ServerCallContext
+from starlette.requests import Request
+
+
+class SchedulerBusyError(Exception):
+    """Raised when every run slot is taken and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"The agent is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ClientCallContextBuilder(DefaultCallContextBuilder):
+    """Records the caller's address, which runs are queued by."""
+
+    def build(self, request: Request) -> ServerCallContext:
+        context = super().build(request)
+        context.state["client"] = request.client.host if request.client else None
+        return context
+
+
+class RunScheduler:
+    """
+    Admission control for agent runs, which all share one local model.
+
+    At most `max_running` runs go at a time. Later ones wait in a queue of
+    at most `max_queued`, served round-robin across clients so one client's
+    burst doesn't hold up everyone else, and are rejected with
+    `SchedulerBusyError` beyond that, with a retry hint estimated from the
+    recent run durations.
+    """
+
+    def __init__(
+        self,
+        max_running: int = 2,
+        max_queued: int = 32,
+        run_seconds: float = 10,
+        window: int = 1000,
+    ):
+        self._max_running = max_running
+        self._max_queued = max_queued
+        self._running = 0
+        # Waiters per client, in the order clients are served
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        # Moving average of run durations, starting from a guess
+        self._run_seconds = run_seconds
+        self._admitted = 0
+        self._rejected = 0
+        self._waits: Deque[float] = deque(maxlen=window)
+
+    @property
+    def stats(self) -> Dict:
+        waits = sorted(self._waits)
+        return {
+            "max_running": self._max_running,
+            "running": self._running,
+            "max_queued": self._max_queued,
+            "queued": self._queued,
+            "clients_waiting": len(self._queues),
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "wait_seconds": {
+                "p50": round(statistics.median(waits), 3) if waits else 0,
+                "p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0,
+                "max": round(waits[-1], 3) if waits else 0,
+            },
+            "run_seconds": round(self._run_seconds, 3),
+        }
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely moved on by one round of runs."""
+        rounds = (self._queued + 1) / self._max_running
+        return max(1, math.ceil(rounds * self._run_seconds))
+
+    @asynccontextmanager
+    async def slot(self, client: str) -> AsyncIterator[None]:
+        """Waits for a run slot, in `client`'s turn, and holds it."""
+        await self._acquire(client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._run_seconds += 0.2 * (time.monotonic() - started - self._run_seconds)
+            self._release()
+
+    async def _acquire(self, client: str):
+        queued_at = time.monotonic()
+        if self._running < self._max_running and not self._queued:
+            self._running += 1
+        elif self._queued >= self._max_queued:
+            self._rejected += 1
+            raise SchedulerBusyError(self.retry_after())
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._queues.setdefault(client, deque()).append(waiter)
+            self._queued += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as the wait was cancelled
+                    self._release()
+                else:
+                    self._forget(client, waiter)
+                raise
+        self._admitted += 1
+        self._waits.append(time.monotonic() - queued_at)
+
+    def _forget(self, client: str, waiter: asyncio.Future):
+        waiters = self._queues.get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._queues[client]
+
+    def _release(self):
+        self._running -= 1
+        while self._queues:
+            # The client first in line is served, then goes to the back
+            client, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if not waiter.done():
+                self._running += 1
+                waiter.set_result(None)
+                return
@@ -0,0 +1,217 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+from a2a_agent.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+FINISHED_STATES: Set[TaskState] = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+
+def compact_task(task: Task) -> Task:
+    """
+    Drops a finished task's streamed progress, the token batches and tool
+    steps each sent as a status update and kept in its history, which the
+    final status and artifacts supersede.
+    """
+    if not task.history:
+        return task
+    return task.model_copy(update={
+        "history": [
+            message for message in task.history
+            if "event" not in (message.metadata or {})
+        ]
+    })
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    A2A tasks in a local SQLite database, so they survive restarts without
+    piling up in memory.
+
+    Saves are buffered and written in one transaction every
+    `flush_interval` seconds: a streamed task is saved on every update,
+    and only its latest state is written. Finished tasks are compacted
+    (see `compact_task`), deleted `retention_seconds` after they finished,
+    and beyond `max_tasks` the oldest are. The database is vacuumed after
+    deletions, at most every `compact_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_seconds: float,
+        max_tasks: int,
+        flush_interval: float = 0.05,
+        evict_interval: float = 60,
+        compact_interval: float = 3600,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._retention_seconds = retention_seconds
+        self._max_tasks = max_tasks
+        self._flush_interval = flush_interval
+        self._evict_interval = evict_interval
+        self._compact_interval = compact_interval
+        self._evicted_at = 0.0
+        self._compacted_at = time.monotonic()
+        self._deleted_since_compaction = 0
+
+        # Tasks saved and not written yet, by id
+        self._pending: Dict[str, Task] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+        # Written to from worker threads, hence the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(
+                """
+                PRAGMA auto_vacuum=INCREMENTAL;
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    context_id TEXT NOT NULL,
+                    finished INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    task TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS tasks_context_id ON tasks (context_id);
+                CREATE INDEX IF NOT EXISTS tasks_finished ON tasks (finished, updated_at);
+                """
+            )
+
+    @property
+    def stats(self) -> Dict:
+        with self._lock:
+            tasks, finished = self._connection.execute(
+                "SELECT count(*), coalesce(sum(finished), 0) FROM tasks").fetchone()
+            pages, page_size = (
+                self._connection.execute("PRAGMA page_count").fetchone()[0],
+                self._connection.execute("PRAGMA page_size").fetchone()[0],
+            )
+        return {
+            "tasks": tasks,
+            "finished": finished,
+            "pending": len(self._pending),
+            "bytes": pages * page_size,
+        }
+
+    async def save(self, task: Task, context: Optional[ServerCallContext] = None) -> None:
+        self._pending[task.id] = task
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def get(self, task_id: str, context: Optional[ServerCallContext] = None) -> Optional[Task]:
+        if (task := self._pending.get(task_id)) is not None:
+            return task
+        row = await asyncio.to_thread(self._read, task_id)
+        return Task.model_validate_json(row) if row is not None else None
+
+    async def delete(self, task_id: str, context: Optional[ServerCallContext] = None) -> None:
+        self._pending.pop(task_id, None)
+        await asyncio.to_thread(self._delete, task_id)
+
+    async def flush(self):
+        """Writes the buffered saves."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        # Serialized here, the tasks may change again once the loop moves on
+        rows = [self._row(task) for task in pending.values()]
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception:
+            # Kept for the next flush, unless saved again since
+            self._pending = pending | self._pending
+            raise
+        if time.monotonic() - self._evicted_at >= self._evict_interval:
+            self._evicted_at = time.monotonic()
+            await asyncio.to_thread(self.evict)
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+        with self._lock:
+            self._connection.close()
+
+    async def _flush_later(self):
+        # Saves made during a flush are picked up by the next one
+        while self._pending:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                _logger.error(f"Failed to write tasks: {e}")
+                return
+
+    @staticmethod
+    def _row(task: Task) -> Tuple:
+        finished = task.status.state in FINISHED_STATES
+        if finished:
+            task = compact_task(task)
+        return (
+            task.id,
+            task.context_id,
+            int(finished),
+            time.time(),
+            task.model_dump_json(exclude_none=True),
+        )
+
+    def _write(self, rows: List[Tuple]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO tasks (id, context_id, finished, updated_at, task)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _read(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT task FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _delete(self, task_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def evict(self) -> int:
+        """Deletes finished tasks past retention or over the limit, returns how many."""
+        with self._lock, self._connection:
+            deleted = self._connection.execute(
+                "DELETE FROM tasks WHERE finished = 1 AND updated_at < ?",
+                (time.time() - self._retention_seconds,),
+            ).rowcount
+            deleted += self._connection.execute(
+                "DELETE FROM tasks WHERE id IN (SELECT id FROM tasks WHERE finished = 1"
+                " ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_tasks,),
+            ).rowcount
+        if deleted:
+            _logger.info(f"Evicted {deleted} finished tasks")
+            self._deleted_since_compaction += deleted
+        if self._deleted_since_compaction and time.monotonic() - self._compacted_at >= self._compact_interval:
+            self.compact()
+        return deleted
+
+    def compact(self):
+        """Returns the space of deleted tasks to the file system."""
+        with self._lock:
+            self._connection.execute("PRAGMA incremental_vacuum")
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._compacted_at = time.monotonic()
+        self._deleted_since_compaction = 0
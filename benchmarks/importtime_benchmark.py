@@ -0,0 +1,100 @@
+"""
+Startup cost of a service: imports its entry point in fresh interpreters
+with `python -X importtime` and reports the total import time and the
+packages that take the longest.
+
+Also checks that the `--deferred` packages, which the service imports on
+first use, stay out of startup, and optionally that the import fits a time
+budget. Exits non-zero when either check fails, so it can gate CI.
+
+Runs with the interpreter it's started with, so from each service's
+directory, with its own dependencies:
+
+    # a2a-agent/: langchain and the MCP client are imported on the first request
+    uv run python ../benchmarks/importtime_benchmark.py --module a2a_agent --budget-ms 800 \
+        --deferred langchain langgraph langchain_ollama langchain_mcp_adapters
+
+    # mcp-server/: search's dependencies are imported on the first search
+    uv run python ../benchmarks/importtime_benchmark.py --module mcp_server --budget-ms 1500 \
+        --deferred langchain_milvus pymilvus langchain_ollama numpy pandas
+
+    # doc-scraper/: only scraping needs the crawler, chunker and embedding
+    # model, so listing, rolling back and exporting versions start quickly
+    uv run python ../benchmarks/importtime_benchmark.py --module main --budget-ms 1500 \
+        --deferred langchain_milvus langchain_ollama aiohttp bs4
+
+Other options: [--repeats 5] [--top 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+
+class ImportTimes(NamedTuple):
+    total_us: int
+    # Self time per top-level package
+    packages: Dict[str, int]
+    modules: List[str]
+
+
+def _import_times(module: str) -> ImportTimes:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total, packages, modules = 0, defaultdict(int), []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        packages[name.strip().split(".")[0]] += int(own)
+        # Unindented, and with everything it imported
+        if name.strip() == module and not name.startswith("  "):
+            total = int(cumulative)
+    return ImportTimes(total, dict(packages), modules)
+
+
+def main(module: str, deferred: List[str], repeats: int, top: int, budget_ms: float) -> int:
+    # The first run compiles bytecode, which isn't startup cost
+    _import_times(module)
+    runs = [_import_times(module) for _ in range(repeats)]
+    totals = sorted(run.total_us / 1e3 for run in runs)
+    print(f"import {module}: median {statistics.median(totals):.0f}ms, "
+          f"min {totals[0]:.0f}ms, max {totals[-1]:.0f}ms over {repeats} runs")
+
+    packages = {
+        package: statistics.median(run.packages.get(package, 0) for run in runs) / 1e3
+        for package in runs[0].packages
+    }
+    print(f"\n{'package':<32} {'self':>8}")
+    for package, elapsed in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<32} {elapsed:>6.0f}ms")
+
+    failed = False
+    loaded = {name.split(".")[0] for name in runs[0].modules}
+    if eager := [package for package in deferred if package in loaded]:
+        print(f"\nFAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if budget_ms and statistics.median(totals) > budget_ms:
+        print(f"\nFAIL: over the {budget_ms:.0f}ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", required=True, help="entry point to import")
+    parser.add_argument("--deferred", nargs="*", default=[], metavar="PACKAGE",
+                        help="packages that must not be imported at startup")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages to list")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail when the median import is slower")
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.deferred, args.repeats, args.top, args.budget_ms))
@@ -0,0 +1,178 @@
+"""
+Compares the heading-aware MermaidDocSplitter with the previous
+RecursiveCharacterTextSplitter(1000/200) over the pages' plain text.
+
+Reports index size (chunks, indexed characters and how much of it is
+duplicated by overlap), how many code examples get cut across chunks, and
+retrieval quality: for every code example, its section heading is used as
+the query and a BM25 ranking over the chunks must return a chunk holding
+the complete example (recall@k and MRR).
+
+Runs on generated VitePress-like fixture pages, or on pages from the
+crawler's HTTP cache with --cache-dir.
+
+Usage (from `doc-scraper/`):
+
+    uv run python -m benchmarks.chunker_benchmark [--pages 24] [--cache-dir .cache/http] [--k 3]
+"""
+import argparse
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from bs4 import BeautifulSoup
+from langchain_community.docstore.document import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.chunker import MermaidDocSplitter
+
+_WORDS = (
+    "node edge link arrow direction subgraph style class label shape theme "
+    "config syntax render layout participant message note loop actor state "
+    "transition relation entity attribute axis series value task section"
+).split()
+
+
+def _fixture_pages(count: int, seed: int = 7) -> Dict[str, str]:
+    rng = random.Random(seed)
+    pages = {}
+    for index in range(count):
+        sections = []
+        for section in range(rng.randint(4, 8)):
+            topic = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {index}x{section}"
+            paragraphs = "".join(
+                f"<p>{' '.join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120)))}.</p>\n"
+                for _ in range(rng.randint(1, 3))
+            )
+            lines = "\n".join(
+                f"    N{index}x{section}x{line} --> N{index}x{section}x{line + 1}"
+                for line in range(rng.randint(6, 40))
+            )
+            code = (
+                f'<h3 id="example-{section}">Example<a class="header-anchor" href="#">#</a></h3>\n'
+                f'<div class="language-mermaid"><button class="copy"></button>'
+                f'<pre class="shiki"><code>flowchart TD\n{lines}\n</code></pre></div>\n'
+            )
+            sections.append(
+                f'<h2 id="s{section}">{topic.title()}<a class="header-anchor" href="#">#</a></h2>\n'
+                f"{paragraphs}{code}"
+            )
+        pages[f"https://example.test/syntax/page{index}.html"] = (
+            f'<html lang="en"><head><title>Page {index}</title></head><body>'
+            f'<nav><a href="/">Home</a></nav><main><div class="vp-doc">'
+            f"<h1>Diagram {index}</h1>\n{''.join(sections)}</div></main></body></html>"
+        )
+    return pages
+
+
+def _cached_pages(cache_dir: str) -> Dict[str, str]:
+    pages = {}
+    for meta_path in Path(cache_dir).glob("*.json"):
+        url = json.loads(meta_path.read_text(encoding="utf-8"))["url"]
+        pages[url] = meta_path.with_suffix(".html").read_text(encoding="utf-8")
+    return pages
+
+
+def _queries(pages: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(query, code) pairs: every code example with the heading above it."""
+    queries = []
+    for html in pages.values():
+        soup = BeautifulSoup(html, "html.parser")
+        for pre in soup.find_all("pre"):
+            code = pre.get_text().strip("\n")
+            heading = pre.find_previous(["h2", "h3"])
+            if code.strip() and heading:
+                parent = heading.find_previous("h2") if heading.name == "h3" else None
+                text = " ".join(h.get_text(" ", strip=True).strip("#") for h in (parent, heading) if h)
+                queries.append((text, code))
+    return queries
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class _BM25:
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self._docs = [Counter(_tokens(text)) for text in texts]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg = sum(self._lengths) / len(self._lengths)
+        frequencies = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in frequencies.items()}
+        self._k1, self._b = k1, b
+
+    def rank(self, query: str) -> List[int]:
+        terms = set(_tokens(query))
+        scores = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms & doc.keys():
+                tf = doc[term]
+                score += self._idf[term] * tf * (self._k1 + 1) / (
+                    tf + self._k1 * (1 - self._b + self._b * length / self._avg))
+            scores.append(score)
+        return sorted(range(len(scores)), key=lambda i: -scores[i])
+
+
+def _baseline(pages: Dict[str, str]) -> List[Document]:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    documents = [
+        Document(page_content=BeautifulSoup(html, "html.parser").get_text(), metadata={"source": url})
+        for url, html in pages.items()
+    ]
+    return splitter.split_documents(documents)
+
+
+def _structured(pages: Dict[str, str]) -> List[Document]:
+    return MermaidDocSplitter().split_documents(
+        [Document(page_content=html, metadata={"source": url}) for url, html in pages.items()]
+    )
+
+
+def _report(name: str, split: Callable, pages: Dict[str, str], queries, source_chars: int, k: int):
+    start = time.perf_counter()
+    chunks = split(pages)
+    elapsed = time.perf_counter() - start
+    texts = [chunk.page_content for chunk in chunks]
+    indexed = sum(len(text) for text in texts)
+
+    bm25 = _BM25(texts)
+    hits, reciprocal_ranks, cut = 0, 0.0, 0
+    for query, code in queries:
+        whole = {i for i, text in enumerate(texts) if code in text}
+        cut += not whole
+        ranking = bm25.rank(query)
+        rank = next((position for position, i in enumerate(ranking) if i in whole), None)
+        hits += rank is not None and rank < k
+        reciprocal_ranks += 1 / (rank + 1) if rank is not None else 0.0
+
+    print(
+        f"{name:<12} {len(chunks):>7} {indexed:>10} {indexed / source_chars:>9.2f}x "
+        f"{cut:>6}/{len(queries):<4} {hits / len(queries):>9.2f} {reciprocal_ranks / len(queries):>6.2f} "
+        f"{elapsed * 1e3:>8.1f}ms"
+    )
+
+
+def main(pages: Dict[str, str], k: int):
+    queries = _queries(pages)
+    if not queries:
+        raise SystemExit("The pages contain no code examples to query for")
+    source_chars = sum(len(BeautifulSoup(html, "html.parser").get_text()) for html in pages.values())
+    print(f"{len(pages)} pages, {len(queries)} code examples, {source_chars} characters of text")
+    print(f"{'splitter':<12} {'chunks':>7} {'chars':>10} {'vs text':>10} {'cut':>11} {f'recall@{k}':>9} {'MRR':>6} {'time':>10}")
+    _report("recursive", _baseline, pages, queries, source_chars, k)
+    _report("structured", _structured, pages, queries, source_chars, k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=24, help="number of fixture pages")
+    parser.add_argument("--cache-dir", help="use pages from the crawler's HTTP cache instead")
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    main(_cached_pages(args.cache_dir) if args.cache_dir else _fixture_pages(args.pages), args.k)
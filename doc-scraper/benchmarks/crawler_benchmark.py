@@ -0,0 +1,129 @@
+"""
+Measures crawler throughput against a local stand-in for the docs site that
+serves generated fixture pages with ETag/Last-Modified validators and an
+artificial per-request latency.
+
+Runs a sequential crawl (the old behaviour), a concurrent cold crawl and a
+concurrent warm crawl where every page is answered with 304 Not Modified.
+The crawler's tests use the same stand-in.
+
+Usage (from `doc-scraper/`):
+
+    uv run python -m benchmarks.crawler_benchmark [--pages 30] [--latency-ms 150] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import hashlib
+import tempfile
+import time
+from email.utils import formatdate
+from typing import Dict, List, NamedTuple, Optional
+from aiohttp import web
+from utils.crawler import Crawler, HttpCache
+
+_LAST_MODIFIED = formatdate(time.time(), usegmt=True)
+
+
+class Request(NamedTuple):
+    path: str
+    started: float
+    finished: float
+    status: int
+    if_none_match: Optional[str]
+
+
+def fixture_pages(count: int) -> Dict[str, str]:
+    pages = {}
+    for index in range(count):
+        paragraphs = "\n".join(
+            f"<p>Paragraph {i} of diagram {index}: A --> B --> C</p>" for i in range(200)
+        )
+        pages[f"/syntax/page{index}.html"] = (
+            f"<html lang=\"en\"><head><title>Diagram {index}</title></head>"
+            f"<body><h1>Diagram {index}</h1>{paragraphs}</body></html>"
+        )
+    return pages
+
+
+async def start_server(
+    pages: Dict[str, str],
+    latency: float,
+    requests: Optional[List[Request]] = None,
+) -> web.AppRunner:
+    """
+    Serves `pages` by path, each response after `latency` seconds. Pages
+    can be changed or removed while it runs; the ETag follows the body.
+    Every request is appended to `requests` when given.
+    """
+
+    async def respond(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        body = pages.get(request.path)
+        if body is None:
+            raise web.HTTPNotFound()
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+        headers = {"ETag": etag, "Last-Modified": _LAST_MODIFIED}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=body, content_type="text/html", headers=headers)
+
+    async def handle(request: web.Request) -> web.Response:
+        started = time.monotonic()
+        status = 500
+        try:
+            response = await respond(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            if requests is not None:
+                requests.append(Request(
+                    request.path, started, time.monotonic(), status,
+                    request.headers.get("If-None-Match"),
+                ))
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def _crawl(label: str, crawler: Crawler, urls: List[str]):
+    start = time.perf_counter()
+    changed = 0
+    async for page in crawler.crawl(urls):
+        changed += page.changed
+    elapsed = time.perf_counter() - start
+    crawler.commit()
+    print(
+        f"{label:<22} {elapsed:8.2f}s {len(urls) / elapsed:10.1f} pages/s "
+        f"{changed:>8} changed  {crawler.stats}"
+    )
+
+
+async def main(pages: int, latency_ms: float, concurrency: int, per_host_rps: float):
+    runner = await start_server(fixture_pages(pages), latency_ms / 1000)
+    port = runner.addresses[0][1]
+    urls = [f"http://127.0.0.1:{port}/syntax/page{index}.html" for index in range(pages)]
+    try:
+        with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as cache_dir:
+            await _crawl("sequential (cold)", Crawler(HttpCache(sequential_dir), 1, 0), urls)
+            await _crawl("concurrent (cold)", Crawler(HttpCache(cache_dir), concurrency, per_host_rps), urls)
+            await _crawl("concurrent (warm)", Crawler(HttpCache(cache_dir), concurrency, per_host_rps), urls)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host-rps", type=float, default=0,
+                        help="per-host rate limit, 0 to disable")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.latency_ms, args.concurrency, args.per_host_rps))
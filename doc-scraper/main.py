@@ -1,13 +1,26 @@
+import argparse
 import asyncio
 import json
 import sys
 import traceback
-from typing import List, Tuple
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import TYPE_CHECKING, AsyncIterator, List, Tuple
 from langchain_community.docstore.document import Document
+from utils.embedding_model import get_embeddings
+from utils.embedding_store import StoredEmbeddings
+from utils.env import Env
 from utils.logger import setup_logger
-from utils.milvus import milvus_from_documents
+from utils.milvus import (
+    CollectionVersion,
+    describe_versions,
+    export_live_snapshot,
+    ranker_kwargs,
+    rollback,
+)
+
+if TYPE_CHECKING:
+    from utils.crawler import Crawler, HttpCache
+
+env = Env()
 
 _logger = setup_logger(__name__)
 
@@ -45,25 +58,29 @@ urls: List[str] = [
 ]
 
 
-async def _scrape_links(links: List[str]) -> List[Document]:
+async def _revalidate(crawler: "Crawler", links: List[str]) -> bool:
+    """
+    Revalidates every page against the HTTP cache and returns whether any
+    changed. Fetched pages are staged on disk rather than kept in memory.
+    """
     try:
-        loader = WebBaseLoader(links)
-
-        # Split into chunks - recursive splitter tries paragraphs, then sentences, then words
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,      # Average characters per chunk
-            chunk_overlap=200,    # Overlap preserves context across chunks
-            add_start_index=True  # Track position in original document
-        )
-        documents: List[Document] = []
-        async for doc in loader.alazy_load():
-            documents.append(doc)
-        return text_splitter.split_documents(documents)
+        changed = False
+        async for page in crawler.crawl(links):
+            changed = changed or page.changed
+        _logger.info(f"Crawled {len(links)} pages: {crawler.stats}")
+        return changed
     except Exception as e:
         _logger.error(e)
         raise e
 
 
+async def _load_documents(cache: "HttpCache", links: List[str]) -> AsyncIterator[Document]:
+    """Yields the raw HTML of each page, which the splitter parses."""
+    for link in links:
+        html = await asyncio.to_thread(cache.body, link)
+        yield Document(page_content=html, metadata={"source": link})
+
+
 def _log_documents(documents_with_score: List[Tuple[Document, float]]):
     shortened_results = [
         {
@@ -79,24 +96,103 @@ def _log_documents(documents_with_score: List[Tuple[Document, float]]):
     )
 
 
-async def _save_documents(documents: List[Document]):
-    vector_store = milvus_from_documents(documents=documents)
-    documents_with_score = await vector_store.asimilarity_search_with_score(
-        "flowchart mermaid", k=5, ranker_type="weighted", ranker_params={"weights": [0.6, 0.4]}
+async def _save_documents(documents: AsyncIterator[Document]):
+    from utils.chunker import MermaidDocSplitter
+    from utils.pipeline import IngestPipeline
+
+    embeddings = get_embeddings()
+    version = await asyncio.to_thread(CollectionVersion)
+    pipeline = IngestPipeline(
+        version,
+        embeddings,
+        # Splits along headings and keeps code examples whole
+        MermaidDocSplitter(max_chars=env.CHUNK_MAX_CHARS),
+        batch_size=env.INGEST_BATCH_SIZE,
+        embed_workers=env.INGEST_EMBED_WORKERS,
+        queue_size=env.INGEST_QUEUE_SIZE,
+    )
+    try:
+        await pipeline.run(documents)
+        if version.unchanged:
+            _logger.info(f"{version.name} matches {version.live}, discarding it")
+            await asyncio.to_thread(version.discard)
+            return
+        await asyncio.to_thread(version.verify)
+    except BaseException:
+        _logger.error(f"Failed to build {version.name}, {env.MILVUS_COLLECTION} is unchanged")
+        await asyncio.to_thread(version.discard)
+        raise
+    await asyncio.to_thread(version.publish)
+    _logger.info(f"Ingested documents: {version.stats}")
+    if isinstance(embeddings, StoredEmbeddings):
+        _logger.info(f"Embedding store: {embeddings.stats}")
+    documents_with_score = await version.vector_store.asimilarity_search_with_score(
+        "flowchart mermaid", k=5, **ranker_kwargs()
     )
     _log_documents(documents_with_score)
 
 
+def _export_snapshot(force: bool = False):
+    """Keeps the local backend's snapshot in step with the live version."""
+    if not env.SNAPSHOT_DIR:
+        if force:
+            raise ValueError("Set SNAPSHOT_DIR to export a snapshot")
+        return
+    export_live_snapshot(env.SNAPSHOT_DIR, force=force)
+
+
 async def main():
+    # The crawler, chunker and their dependencies are only imported to scrape,
+    # so listing, rolling back and exporting versions start faster
+    from utils.chunker import CHUNKER_VERSION
+    from utils.crawler import Crawler, HttpCache
+
     _logger.info("Starting doc-scraper...")
-    documents = await _scrape_links(urls)
-    await _save_documents(documents=documents)
+    cache = HttpCache(env.CRAWL_CACHE_DIR)
+    # Chunks of another chunker version or size are stale even if the pages aren't
+    chunker_version = f"{CHUNKER_VERSION}:{env.CHUNK_MAX_CHARS}"
+    stale = cache.ingested_version != chunker_version
+    crawler = Crawler(
+        cache=cache,
+        concurrency=env.CRAWL_CONCURRENCY,
+        per_host_rps=env.CRAWL_PER_HOST_RPS,
+        timeout=env.CRAWL_TIMEOUT,
+        user_agent=env.CRAWL_USER_AGENT,
+    )
+    changed = await _revalidate(crawler, urls)
+    if stale:
+        _logger.info(f"Chunks were ingested with chunker {cache.ingested_version}, re-ingesting with {chunker_version}")
+    if not changed and not stale and not env.FORCE_INGEST:
+        _logger.info("No page changed since the last crawl, skipping ingestion")
+        crawler.commit()
+        await asyncio.to_thread(_export_snapshot)
+        return
+    await _save_documents(_load_documents(cache, urls))
+    crawler.commit()
+    cache.set_ingested_version(chunker_version)
+    await asyncio.to_thread(_export_snapshot)
     _logger.info("Finished scraping docs")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrapes the Mermaid docs into Milvus")
+    parser.add_argument("--list-versions", action="store_true",
+                        help="list the collection versions and exit")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="VERSION",
+                        help="point the collection alias back at VERSION (default: the previous one) and exit")
+    parser.add_argument("--export-snapshot", action="store_true",
+                        help="export the live version to SNAPSHOT_DIR and exit")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        if args.list_versions:
+            print(json.dumps(describe_versions(), indent=4))
+        elif args.rollback is not None:
+            _logger.info(f"Rolled back to {rollback(args.rollback or None)}")
+            _export_snapshot()
+        elif args.export_snapshot:
+            _export_snapshot(force=True)
+        else:
+            asyncio.run(main())
     except Exception as e:
         traceback.print_exc()
         sys.exit(str(e))
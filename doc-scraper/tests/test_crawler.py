@@ -0,0 +1,205 @@
+"""
+Tests of the crawler against the local stand-in for the docs site that the
+crawler benchmark uses.
+
+Usage (from `doc-scraper/`):
+
+    uv run --with pytest pytest tests
+"""
+import asyncio
+import socket
+from typing import Dict, List, Tuple
+import aiohttp
+import pytest
+from benchmarks.crawler_benchmark import Request, fixture_pages, start_server
+from utils.crawler import Crawler, HostRateLimiter, HttpCache, Page
+
+
+async def _crawl(crawler: Crawler, urls: List[str]) -> Dict[str, Page]:
+    return {page.url: page async for page in crawler.crawl(urls)}
+
+
+async def _with_server(pages: Dict[str, str], scenario, latency: float = 0):
+    """Runs `scenario(urls, requests)` against a stand-in serving `pages`."""
+    requests: List[Request] = []
+    runner = await start_server(pages, latency, requests)
+    port = runner.addresses[0][1]
+    try:
+        return await scenario([f"http://127.0.0.1:{port}{path}" for path in pages], requests)
+    finally:
+        await runner.cleanup()
+
+
+def _max_in_flight(requests: List[Request]) -> int:
+    edges: List[Tuple[float, int]] = []
+    for request in requests:
+        edges += [(request.started, 1), (request.finished, -1)]
+    in_flight = peak = 0
+    # Ends sort before starts at the same instant
+    for _, change in sorted(edges):
+        in_flight += change
+        peak = max(peak, in_flight)
+    return peak
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_cold_crawl_fetches_every_page(tmp_path):
+    pages = fixture_pages(5)
+
+    async def scenario(urls, requests):
+        crawler = Crawler(HttpCache(str(tmp_path)), concurrency=4, per_host_rps=0)
+        crawled = await _crawl(crawler, urls)
+        crawler.commit()
+        return urls, crawled, crawler.stats
+
+    urls, crawled, stats = asyncio.run(_with_server(pages, scenario))
+    assert set(crawled) == set(urls)
+    assert all(page.changed for page in crawled.values())
+    assert [crawled[url].html for url in urls] == list(pages.values())
+    assert stats["fetched"] == 5 and stats["not_modified"] == 0
+    cache = HttpCache(str(tmp_path))
+    assert all(cache.get(url).etag for url in urls)
+
+
+def test_not_modified_pages_come_from_the_cache(tmp_path):
+    pages = fixture_pages(5)
+
+    async def scenario(urls, requests):
+        cold = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        await _crawl(cold, urls)
+        cold.commit()
+        requests.clear()
+        warm = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        return urls, await _crawl(warm, urls), warm, requests
+
+    urls, crawled, warm, requests = asyncio.run(_with_server(pages, scenario))
+    assert not any(page.changed for page in crawled.values())
+    assert [crawled[url].html for url in urls] == list(pages.values())
+    assert warm.stats["not_modified"] == 5 and warm.stats["fetched"] == 0
+    # Conditional requests, answered without a body
+    assert all(request.if_none_match and request.status == 304 for request in requests)
+    assert warm._staged == []
+
+
+def test_changed_pages_are_detected(tmp_path):
+    pages = fixture_pages(3)
+    changed_path = list(pages)[1]
+
+    async def scenario(urls, requests):
+        cold = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        await _crawl(cold, urls)
+        cold.commit()
+        pages[changed_path] += "<p>A new paragraph</p>"
+        warm = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        return await _crawl(warm, urls), warm.stats
+
+    crawled, stats = asyncio.run(_with_server(pages, scenario))
+    changed = {url for url, page in crawled.items() if page.changed}
+    assert len(changed) == 1 and changed.pop().endswith(changed_path)
+    assert stats["fetched"] == 1 and stats["not_modified"] == 2
+
+
+def test_uncommitted_pages_are_fetched_again(tmp_path):
+    """A failed ingestion doesn't commit, so the next run sees the change again."""
+    pages = fixture_pages(2)
+    changed_path = list(pages)[0]
+
+    async def scenario(urls, requests):
+        cold = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        await _crawl(cold, urls)
+        cold.commit()
+        pages[changed_path] += "<p>A new paragraph</p>"
+
+        failed = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        first = await _crawl(failed, urls)
+        # Ingestion failed: no commit, the committed entry is still the old one
+        cache = HttpCache(str(tmp_path))
+        url = next(url for url in urls if url.endswith(changed_path))
+        committed = cache.get(url).body
+        staged = cache.body(url)
+
+        retry = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        second = await _crawl(retry, urls)
+        retry.commit()
+        return url, first, committed, staged, second, HttpCache(str(tmp_path)).get(url).body
+
+    url, first, committed, staged, second, after = asyncio.run(_with_server(pages, scenario))
+    assert first[url].changed and second[url].changed
+    assert committed != pages[changed_path]
+    assert staged == pages[changed_path]
+    assert after == pages[changed_path]
+
+
+def test_unreachable_pages_fall_back_to_the_cache(tmp_path):
+    url = f"http://127.0.0.1:{_unused_port()}/syntax/flowchart.html"
+    cache = HttpCache(str(tmp_path))
+    cache.stage(url, '"v1"', None, "<html>cached</html>")
+    cache.commit(url)
+
+    crawler = Crawler(cache, per_host_rps=0, timeout=5)
+    crawled = asyncio.run(_crawl(crawler, [url]))
+    assert crawled[url] == Page(url, "<html>cached</html>", changed=False)
+    assert crawler.stats["failed"] == 1
+
+
+def test_unreachable_pages_without_a_cached_copy_fail(tmp_path):
+    url = f"http://127.0.0.1:{_unused_port()}/syntax/flowchart.html"
+    crawler = Crawler(HttpCache(str(tmp_path)), per_host_rps=0, timeout=5)
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(_crawl(crawler, [url]))
+
+
+def test_missing_pages_fail(tmp_path):
+    async def scenario(urls, requests):
+        crawler = Crawler(HttpCache(str(tmp_path)), per_host_rps=0)
+        await _crawl(crawler, [urls[0].rsplit("/", 1)[0] + "/missing.html"])
+
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        asyncio.run(_with_server(fixture_pages(1), scenario))
+    assert error.value.status == 404
+
+
+def test_concurrency_is_bounded(tmp_path):
+    async def scenario(urls, requests):
+        crawler = Crawler(HttpCache(str(tmp_path)), concurrency=3, per_host_rps=0)
+        await _crawl(crawler, urls)
+        return requests
+
+    requests = asyncio.run(_with_server(fixture_pages(12), scenario, latency=0.05))
+    assert len(requests) == 12
+    assert _max_in_flight(requests) == 3
+
+
+def test_requests_to_a_host_are_rate_limited(tmp_path):
+    async def scenario(urls, requests):
+        crawler = Crawler(HttpCache(str(tmp_path)), concurrency=8, per_host_rps=20)
+        await _crawl(crawler, urls)
+        return requests
+
+    requests = asyncio.run(_with_server(fixture_pages(6), scenario))
+    starts = sorted(request.started for request in requests)
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    # 1 / 20 rps apart, give or take the event loop's timer resolution
+    assert min(gaps) >= 0.04
+    assert starts[-1] - starts[0] >= 5 * 0.05 * 0.9
+
+
+def test_rate_limit_is_per_host():
+    async def scenario():
+        limiter = HostRateLimiter(requests_per_second=2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(limiter.wait(host) for host in ("a.example", "b.example", "c.example")))
+        first_round = loop.time() - started
+        await limiter.wait("a.example")
+        return first_round, loop.time() - started
+
+    first_round, second = asyncio.run(scenario())
+    # One request to each host goes right away, the next to a host waits
+    assert first_round < 0.1
+    assert second >= 0.45
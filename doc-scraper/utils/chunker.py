@@ -0,0 +1,185 @@
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+from bs4 import BeautifulSoup, Tag
+from langchain_community.docstore.document import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
+# Doc page slug -> diagram type; other syntax pages use their lower-cased slug
+DIAGRAM_TYPES = {
+    "flowchart": "flowchart",
+    "sequenceDiagram": "sequence",
+    "classDiagram": "class",
+    "stateDiagram": "state",
+    "entityRelationshipDiagram": "er",
+    "userJourney": "journey",
+    "quadrantChart": "quadrant",
+    "requirementDiagram": "requirement",
+    "xyChart": "xychart",
+    "examples": "general",
+}
+
+# Bump when the chunks or their metadata fields change, so that the next
+# run re-ingests the docs even if no page changed
+CHUNKER_VERSION = 1
+
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4}
+_BLOCKS = {"p", "li", "pre", "table", "blockquote", "dt", "dd"}
+_NOISE = ["script", "style", "noscript", "nav", "header", "footer", "aside", "svg", "button"]
+_LANGUAGE_CLASS = re.compile(r"language-([\w-]+)")
+
+
+def diagram_type_from_url(url: str) -> str:
+    parts = urlsplit(url).path.strip("/").split("/")
+    if "config" in parts:
+        return "config"
+    slug = parts[-1].removesuffix(".html") if parts else ""
+    return DIAGRAM_TYPES.get(slug, slug.lower())
+
+
+def page_metadata(soup: BeautifulSoup, url: str) -> Dict[str, str]:
+    """
+    The metadata `WebBaseLoader` would extract, except that every key is
+    always present, as the Milvus schema requires.
+    """
+    title = soup.find("title")
+    description = soup.find("meta", attrs={"name": "description"})
+    html = soup.find("html")
+    return {
+        "source": url,
+        "title": title.get_text() if title else "",
+        "description": description.get("content", "No description found.")
+        if description else "No description found.",
+        "language": html.get("lang", "No language found.") if html else "No language found.",
+        "diagram_type": diagram_type_from_url(url),
+    }
+
+
+class _Block(NamedTuple):
+    text: str
+    # Heading level, 0 for content
+    level: int
+    # Code blocks are never split
+    atomic: bool
+
+
+def _code_language(pre: Tag) -> str:
+    for tag in (pre.find("code"), pre, pre.parent):
+        match = tag and _LANGUAGE_CLASS.search(" ".join(tag.get("class", [])))
+        if match:
+            return match.group(1)
+    return ""
+
+
+def _block_text(tag: Tag) -> str:
+    if tag.name == "table":
+        rows = (
+            " | ".join(cell.get_text(" ", strip=True) for cell in row.find_all(["th", "td"]))
+            for row in tag.find_all("tr")
+        )
+        return "\n".join(row for row in rows if row)
+    return tag.get_text(" ", strip=True)
+
+
+def _iter_blocks(soup: BeautifulSoup) -> Iterator[_Block]:
+    root = soup.select_one(".vp-doc") or soup.find("main") or soup.body or soup
+    for tag in root.find_all(_NOISE):
+        tag.decompose()
+    for anchor in root.select("a.header-anchor"):
+        anchor.decompose()
+
+    names = list(_HEADINGS) + list(_BLOCKS)
+    for tag in root.find_all(names):
+        # Nested blocks are part of their outermost block's text
+        if any(parent.name in _BLOCKS for parent in tag.parents):
+            continue
+        if tag.name in _HEADINGS:
+            text = tag.get_text(" ", strip=True).strip("#\u200b ")
+            if text:
+                yield _Block(text, _HEADINGS[tag.name], atomic=False)
+        elif tag.name == "pre":
+            code = tag.get_text().strip("\n")
+            if code.strip():
+                yield _Block(f"```{_code_language(tag)}\n{code}\n```", 0, atomic=True)
+        elif text := _block_text(tag):
+            yield _Block(text, 0, atomic=False)
+
+
+class MermaidDocSplitter(TextSplitter):
+    """
+    Splits the HTML of a Mermaid doc page along its headings instead of at
+    fixed offsets. Chunks never span sections, code blocks (the diagram
+    examples) are never split and chunks don't overlap.
+
+    Every chunk starts with its section path, e.g. "Flowcharts > Node
+    shapes", and is tagged with its `diagram_type`, `section` and the
+    `start_index` of its first block in the page's text.
+
+    `diagram_type` and `section_key` are scalar-indexed for search filters.
+    """
+
+    def __init__(self, max_chars: int = 2000, **kwargs):
+        super().__init__(chunk_size=max_chars, chunk_overlap=0, **kwargs)
+        self._max_chars = max_chars
+        self._fallback = RecursiveCharacterTextSplitter(chunk_size=max_chars, chunk_overlap=0)
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.page_content for chunk in self._split_html(text, {})]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        chunks = []
+        for document in documents:
+            chunks += self._split_html(document.page_content, document.metadata)
+        return chunks
+
+    def _pieces(self, block: _Block) -> List[str]:
+        if block.atomic or len(block.text) <= self._max_chars:
+            return [block.text]
+        return self._fallback.split_text(block.text)
+
+    def _split_html(self, html: str, metadata: Dict) -> List[Document]:
+        soup = BeautifulSoup(html, "html.parser")
+        url = metadata.get("source", "")
+        page = {**metadata, **page_metadata(soup, url)}
+
+        chunks: List[Document] = []
+        path: List[tuple] = []
+        body: List[str] = []
+        size = 0
+        offset = 0
+        start_index: Optional[int] = None
+
+        def flush():
+            nonlocal body, size, start_index
+            if body:
+                section = " > ".join(text for _, text in path)
+                content = "\n\n".join(([section] if section else []) + body)
+                chunks.append(Document(
+                    page_content=content,
+                    metadata={
+                        **page,
+                        "section": section,
+                        # Lower-cased for case-insensitive section filters
+                        "section_key": section.lower(),
+                        "start_index": start_index,
+                    },
+                ))
+            body, size, start_index = [], 0, None
+
+        for block in _iter_blocks(soup):
+            if block.level:
+                flush()
+                path = [(level, text) for level, text in path if level < block.level]
+                path.append((block.level, block.text))
+            else:
+                for piece in self._pieces(block):
+                    if body and size + len(piece) > self._max_chars:
+                        flush()
+                    if start_index is None:
+                        start_index = offset + max(block.text.find(piece), 0)
+                    body.append(piece)
+                    size += len(piece) + 2
+            # Offsets are into the page's blocks joined by blank lines
+            offset += len(block.text) + 2
+        flush()
+        return chunks
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+import aiohttp
+from utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+
+class Page(NamedTuple):
+    url: str
+    html: str
+    # False when the server answered 304 Not Modified (or was unreachable)
+    # and the body came from the HTTP cache
+    changed: bool
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: str
+
+
+class HttpCache:
+    """
+    On-disk cache of page bodies and their validators (ETag and
+    Last-Modified), used to make conditional requests on the next crawl.
+
+    Fresh responses are staged next to the committed entry and only replace
+    it on `commit()`. The cache also records the chunker version its pages
+    were last ingested with.
+    """
+
+    def __init__(self, root: str):
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._ingested_path = self._root / "ingested_version"
+
+    def _paths(self, url: str, staged: bool = False):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        suffix = ".staged" if staged else ""
+        return self._root / f"{name}.json{suffix}", self._root / f"{name}.html{suffix}"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(meta.get("etag"), meta.get("last_modified"), body)
+
+    def body(self, url: str) -> Optional[str]:
+        """The latest known body of the page, staged or committed."""
+        for staged in (True, False):
+            try:
+                return self._paths(url, staged)[1].read_text(encoding="utf-8")
+            except OSError:
+                continue
+        return None
+
+    def stage(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        meta_path, body_path = self._paths(url, staged=True)
+        body_path.write_text(body, encoding="utf-8")
+        meta_path.write_text(
+            json.dumps({
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": time.time(),
+            }),
+            encoding="utf-8",
+        )
+
+    def unstage(self, url: str):
+        for path in self._paths(url, staged=True):
+            path.unlink(missing_ok=True)
+
+    @property
+    def ingested_version(self) -> Optional[str]:
+        """The chunker version the committed pages were last ingested with."""
+        try:
+            return self._ingested_path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def set_ingested_version(self, version: str):
+        staged_path = self._ingested_path.with_suffix(".staged")
+        staged_path.write_text(version, encoding="utf-8")
+        os.replace(staged_path, self._ingested_path)
+
+    def commit(self, url: str):
+        meta_path, body_path = self._paths(url)
+        staged_meta_path, staged_body_path = self._paths(url, staged=True)
+        os.replace(staged_body_path, body_path)
+        # Replaced last so a half-committed entry is never used for validation
+        os.replace(staged_meta_path, meta_path)
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least 1 / `requests_per_second`."""
+
+    def __init__(self, requests_per_second: float):
+        self._interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        if not self._interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0))
+            self._next_slot[host] = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Crawler:
+    """
+    Fetches pages concurrently over a shared connection pool, with a global
+    concurrency limit, per-host rate limiting and conditional requests
+    against an on-disk HTTP cache.
+
+    Fresh responses are only committed to the cache by `commit()`, so pages
+    of a run whose ingestion failed are fetched again next time.
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache,
+        concurrency: int = 8,
+        per_host_rps: float = 5,
+        timeout: float = 30,
+        user_agent: str = "mermaid-doc-scraper",
+    ):
+        self._cache = cache
+        self._concurrency = concurrency
+        self._rate_limiter = HostRateLimiter(per_host_rps)
+        self._timeout = timeout
+        self._user_agent = user_agent
+        self._staged: List[str] = []
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "bytes": 0}
+
+    def commit(self):
+        for url in self._staged:
+            self._cache.commit(url)
+        self._staged.clear()
+
+    async def crawl(self, urls: List[str]) -> AsyncIterator[Page]:
+        """Yields pages as they complete, not in input order."""
+        semaphore = asyncio.Semaphore(self._concurrency)
+        connector = aiohttp.TCPConnector(
+            limit=self._concurrency,
+            limit_per_host=self._concurrency,
+        )
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self._timeout),
+            headers={"User-Agent": self._user_agent},
+        ) as session:
+
+            async def fetch(url: str) -> Page:
+                async with semaphore:
+                    return await self._fetch(session, url)
+
+            tasks = [asyncio.create_task(fetch(url)) for url in urls]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Page:
+        # Left over from a run whose ingestion failed
+        self._cache.unstage(url)
+        cached = self._cache.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        await self._rate_limiter.wait(urlsplit(url).netloc)
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    self.stats["not_modified"] += 1
+                    return Page(url, cached.body, changed=False)
+                response.raise_for_status()
+                body = await response.text()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["failed"] += 1
+            if cached is None:
+                raise
+            _logger.warning(f"Failed to fetch {url}, using cached copy: {e!r}")
+            return Page(url, cached.body, changed=False)
+
+        self.stats["fetched"] += 1
+        self.stats["bytes"] += len(body)
+        changed = cached is None or cached.body != body
+        self._cache.stage(url, etag, last_modified, body)
+        self._staged.append(url)
+        return Page(url, body, changed=changed)
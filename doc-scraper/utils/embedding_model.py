@@ -1,5 +1,6 @@
-
-from langchain_ollama import OllamaEmbeddings
+from functools import cache
+from langchain_core.embeddings import Embeddings
+from utils.embedding_store import EmbeddingStore, StoredEmbeddings
 from utils.env import Env
 from utils.logger import setup_logger
 
@@ -7,8 +8,23 @@ env = Env()
 
 _logger = setup_logger(__name__)
 
-_logger.debug(
-    f"Initiating Ollama Embedding Model with id: {env.EMBEDDING_MODEL}")
-embeddings = OllamaEmbeddings(model=env.EMBEDDING_MODEL)
-_logger.debug(
-    f"Initiated successfully")
+
+@cache
+def get_embeddings() -> Embeddings:
+    """
+    The Ollama embedding model, backed by the embedding store when
+    EMBEDDING_CACHE_PATH is set. Created (and langchain_ollama imported) on
+    first use, so commands that don't embed anything skip both.
+    """
+    from langchain_ollama import OllamaEmbeddings
+
+    _logger.debug(
+        f"Initiating Ollama Embedding Model with id: {env.EMBEDDING_MODEL}")
+    embeddings = OllamaEmbeddings(model=env.EMBEDDING_MODEL)
+    if env.EMBEDDING_CACHE_PATH:
+        # Namespaced by model, so changing EMBEDDING_MODEL starts a fresh namespace
+        embeddings = StoredEmbeddings(
+            embeddings, EmbeddingStore(env.EMBEDDING_CACHE_PATH), env.EMBEDDING_MODEL)
+    _logger.debug(
+        f"Initiated successfully")
+    return embeddings
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    SQLite store of document embeddings keyed by (model, text hash).
+
+    Every model gets its own namespace, so switching models doesn't clash
+    with or wipe the vectors of the previous one. Vectors are stored as
+    float32 blobs.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the pipeline's worker threads, hence the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash)"
+                ") WITHOUT ROWID"
+            )
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        vectors = {}
+        # Stays below SQLite's limit on bound parameters
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT text_hash, vector FROM embeddings"
+                    f" WHERE model = ? AND text_hash IN ({', '.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+            for hash, blob in rows:
+                vectors[hash] = array("f", blob).tolist()
+        return vectors
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, hash, array("f", vector).tobytes()) for hash, vector in vectors.items()],
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class StoredEmbeddings(Embeddings):
+    """
+    Wraps an embedding model and serves document embeddings from an
+    `EmbeddingStore` where possible, only embedding texts it hasn't seen
+    with this model. Query embeddings are passed through untouched.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model: str):
+        self._embeddings = embeddings
+        self._store = store
+        self._model = model
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _lookup(self, texts: List[str]):
+        hashes = [text_hash(text) for text in texts]
+        stored = self._store.get_many(self._model, list(set(hashes)))
+        missing = {hash: text for hash, text in zip(hashes, texts) if hash not in stored}
+        misses = sum(hash not in stored for hash in hashes)
+        self.stats["hits"] += len(hashes) - misses
+        self.stats["misses"] += misses
+        return hashes, stored, list(missing.items())
+
+    def _store_new(self, stored: Dict[str, List[float]], missing, vectors: List[List[float]]):
+        # Rounded to float32 like stored vectors, so hits and misses agree
+        fresh = {hash: array("f", vector).tolist() for (hash, _), vector in zip(missing, vectors)}
+        self._store.put_many(self._model, fresh)
+        stored.update(fresh)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, stored, missing = self._lookup(texts)
+        if missing:
+            vectors = self._embeddings.embed_documents([text for _, text in missing])
+            self._store_new(stored, missing, vectors)
+        return [stored[hash] for hash in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, stored, missing = await asyncio.to_thread(self._lookup, texts)
+        if missing:
+            vectors = await self._embeddings.aembed_documents([text for _, text in missing])
+            await asyncio.to_thread(self._store_new, stored, missing, vectors)
+        return [stored[hash] for hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._embeddings.aembed_query(text)
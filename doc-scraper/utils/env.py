@@ -1,9 +1,41 @@
+from typing import List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Env(BaseSettings):
     EMBEDDING_MODEL: str
     MILVUS_URI: str
+    # SQLite store of document embeddings per model, empty to disable
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+    # Alias readers query; each ingestion builds a new `<alias>_v<ms>` collection
+    MILVUS_COLLECTION: str = "mermaid_docs"
+    # Versions kept for rollback, including the live one
+    MILVUS_VERSIONS_TO_KEEP: int = 3
+    # Ranker of the searches that check new versions, see the MCP server's
+    # SEARCH_RANKER
+    SEARCH_RANKER: Literal["weighted", "rrf"] = "weighted"
+    SEARCH_WEIGHTS: List[float] = [0.6, 0.4]
+    SEARCH_RRF_K: int = 60
+    # Directory to export the live version to for the MCP server's local
+    # backend (`VECTOR_BACKEND=local`), empty to disable
+    SNAPSHOT_DIR: str = ""
+
+    # Crawler
+    CRAWL_CONCURRENCY: int = 8
+    # Requests per second per host, 0 disables rate limiting
+    CRAWL_PER_HOST_RPS: float = 5
+    CRAWL_TIMEOUT: float = 30
+    CRAWL_CACHE_DIR: str = ".cache/http"
+    CRAWL_USER_AGENT: str = "mermaid-doc-scraper"
+    # Upper bound on chunk size; code examples longer than this stay whole
+    CHUNK_MAX_CHARS: int = 2000
+    # Ingest pipeline: chunks per embedding request, concurrent embedding
+    # requests and batches buffered between stages
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_EMBED_WORKERS: int = 4
+    INGEST_QUEUE_SIZE: int = 8
+    # Re-ingest even when no page changed since the last crawl
+    FORCE_INGEST: bool = False
 
     model_config = SettingsConfigDict(
         env_file=".env"
@@ -1,22 +1,289 @@
-from typing import List
+import hashlib
+import json
+import re
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from pymilvus import MilvusClient
 from utils.env import Env
-from langchain_milvus import Milvus, BM25BuiltInFunction
 from langchain_community.docstore.document import Document
-from utils.embedding_model import embeddings
+from utils.embedding_model import get_embeddings
+from utils.logger import setup_logger
+from utils.snapshot import current_snapshot, export_snapshot
+
+if TYPE_CHECKING:
+    from langchain_milvus import Milvus
 
 env = Env()
 
+_logger = setup_logger(__name__)
+
+_PRIMARY_FIELD = "pk"
+_VECTOR_FIELD = "dense"
+# Metadata fields searches filter on
+_FILTER_FIELDS = ["diagram_type", "section_key"]
+
+
+def content_hash(document: Document) -> str:
+    """Hash of everything stored for a chunk, except its own hash."""
+    metadata = {k: v for k, v in document.metadata.items() if k != "content_hash"}
+    payload = json.dumps([document.page_content, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_ids(documents: List[Document]) -> List[str]:
+    """
+    Gives every chunk a stable id derived from its source page and text, and
+    stores its content hash in the metadata.
 
-def milvus_from_documents(documents: List[Document]) -> Milvus:
-    return Milvus.from_documents(
-        documents=documents,
-        embedding=embeddings,
+    The id doesn't change when a chunk only moves within its page, so such a
+    chunk keeps its stored vector instead of being embedded again. Repeated chunks
+    within a page are told apart by their occurrence number.
+    """
+    ids = []
+    occurrences: Dict[str, int] = {}
+    for document in documents:
+        digest = hashlib.sha256(
+            f"{document.metadata.get('source')}\0{document.page_content}".encode("utf-8")
+        ).hexdigest()[:32]
+        occurrence = occurrences.get(digest, 0)
+        occurrences[digest] = occurrence + 1
+        ids.append(f"{digest}-{occurrence}")
+        document.metadata["content_hash"] = content_hash(document)
+    return ids
+
+
+def _vector_store(collection_name: str) -> "Milvus":
+    # Only needed to ingest and search, not to list or roll back versions
+    from langchain_milvus import Milvus, BM25BuiltInFunction
+
+    return Milvus(
+        embedding_function=get_embeddings(),
         builtin_function=BM25BuiltInFunction(),
         # `dense` is for Ollama embeddings, `sparse` is the output field of BM25 function
-        vector_field=["dense", "sparse"],
+        vector_field=[_VECTOR_FIELD, "sparse"],
+        collection_name=collection_name,
         connection_args={
             "uri": env.MILVUS_URI,
         },
         consistency_level="Strong",
-        drop_old=True,
     )
+
+
+def ranker_kwargs() -> Dict:
+    """Hybrid search ranker arguments, as configured for the MCP server."""
+    if env.SEARCH_RANKER == "rrf":
+        return {"ranker_type": "rrf", "ranker_params": {"k": env.SEARCH_RRF_K}}
+    return {"ranker_type": "weighted", "ranker_params": {"weights": env.SEARCH_WEIGHTS}}
+
+
+def _client() -> MilvusClient:
+    return MilvusClient(uri=env.MILVUS_URI)
+
+
+def live_version(client: MilvusClient) -> Optional[str]:
+    """Name of the collection `MILVUS_COLLECTION` currently points at."""
+    if env.MILVUS_COLLECTION not in client.list_aliases()["aliases"]:
+        return None
+    return client.describe_alias(env.MILVUS_COLLECTION)["collection_name"]
+
+
+def list_versions(client: MilvusClient) -> List[str]:
+    """Versioned collections behind the alias, oldest first."""
+    pattern = re.compile(rf"{re.escape(env.MILVUS_COLLECTION)}_v(\d+)")
+    versions = [name for name in client.list_collections() if pattern.fullmatch(name)]
+    return sorted(versions, key=lambda name: int(pattern.fullmatch(name).group(1)))
+
+
+def _can_reuse(client: MilvusClient, collection_name: str) -> bool:
+    """Whether the collection has the chunk ids and hashes to reuse vectors from."""
+    description = client.describe_collection(collection_name)
+    fields = {field["name"] for field in description["fields"]}
+    return not description.get("auto_id") and "content_hash" in fields
+
+
+def _existing_hashes(client: MilvusClient, collection_name: str) -> Dict[str, str]:
+    iterator = client.query_iterator(
+        collection_name,
+        batch_size=1000,
+        output_fields=[_PRIMARY_FIELD, "content_hash"],
+    )
+    hashes = {}
+    try:
+        while batch := iterator.next():
+            for row in batch:
+                hashes[row[_PRIMARY_FIELD]] = row["content_hash"]
+    finally:
+        iterator.close()
+    return hashes
+
+
+def _existing_vectors(client: MilvusClient, collection_name: str, ids: List[str]) -> Dict[str, List[float]]:
+    vectors = {}
+    for start in range(0, len(ids), 1000):
+        rows = client.query(
+            collection_name,
+            ids=ids[start:start + 1000],
+            output_fields=[_PRIMARY_FIELD, _VECTOR_FIELD],
+        )
+        for row in rows:
+            vectors[row[_PRIMARY_FIELD]] = [float(x) for x in row[_VECTOR_FIELD]]
+    return vectors
+
+
+def _create_filter_indexes(client: MilvusClient, collection_name: str):
+    """Inverted indexes on the filter fields, so filtered searches skip other chunks."""
+    fields = {field["name"] for field in client.describe_collection(collection_name)["fields"]}
+    index_params = client.prepare_index_params()
+    for field in _FILTER_FIELDS:
+        if field in fields:
+            index_params.add_index(field_name=field, index_type="INVERTED")
+    if len(index_params):
+        client.create_index(collection_name, index_params)
+
+
+def _verify(vector_store: "Milvus", expected: int):
+    """Checks the row count and warms the new collection up with a search."""
+    count = vector_store.client.query(
+        vector_store.collection_name, filter="", output_fields=["count(*)"]
+    )[0]["count(*)"]
+    if count != expected:
+        raise RuntimeError(
+            f"{vector_store.collection_name} has {count} chunks, expected {expected}")
+    if not vector_store.similarity_search_with_score("flowchart mermaid", k=1, **ranker_kwargs()):
+        raise RuntimeError(f"{vector_store.collection_name} returned no search results")
+
+
+def _point_alias(client: MilvusClient, collection_name: str):
+    """Atomically switches the alias readers query through to `collection_name`."""
+    if live_version(client) is None:
+        client.create_alias(collection_name, env.MILVUS_COLLECTION)
+    else:
+        client.alter_alias(collection_name, env.MILVUS_COLLECTION)
+    _logger.info(f"{env.MILVUS_COLLECTION} now points at {collection_name}")
+
+
+def _prune_versions(client: MilvusClient):
+    """
+    Keeps the newest MILVUS_VERSIONS_TO_KEEP versions for rollback, releasing
+    all but the live one from memory, and drops the rest.
+    """
+    live = live_version(client)
+    versions = list_versions(client)
+    keep = set(versions[-env.MILVUS_VERSIONS_TO_KEEP:]) | {live}
+    for name in versions:
+        if name == live:
+            continue
+        if name in keep:
+            client.release_collection(name)
+        else:
+            _logger.info(f"Dropping old version {name}")
+            client.drop_collection(name)
+
+
+class CollectionVersion:
+    """
+    A new version of the collection, built next to the live one and only
+    published by pointing the `MILVUS_COLLECTION` alias at it once it's
+    verified, so readers never see a partially ingested collection.
+
+    Chunks that are already in the live version keep their stored vector,
+    only new chunks need to be embedded.
+    """
+
+    def __init__(self):
+        self._client = _client()
+        self.live = live_version(self._client)
+        reusable = self.live is not None and _can_reuse(self._client, self.live)
+        # Only ids and hashes of the live version are held, not its chunks
+        self._existing = _existing_hashes(self._client, self.live) if reusable else {}
+        self._ids = set()
+        self.name = f"{env.MILVUS_COLLECTION}_v{int(time.time() * 1000)}"
+        self.vector_store = _vector_store(self.name)
+        self.stats = {"embedded": 0, "reused": 0, "updated": 0, "deleted": 0}
+
+    def stored_vectors(self, ids: List[str], documents: List[Document]) -> Dict[str, List[float]]:
+        """Vectors of the live version for the chunks it already has."""
+        known = [id for id in ids if id in self._existing]
+        vectors = _existing_vectors(self._client, self.live, known) if known else {}
+        for id, document in zip(ids, documents):
+            if id in vectors and self._existing[id] != document.metadata["content_hash"]:
+                self.stats["updated"] += 1
+        return vectors
+
+    def insert(self, ids: List[str], documents: List[Document], vectors: List[List[float]], reused: int):
+        self.vector_store.add_embeddings(
+            texts=[document.page_content for document in documents],
+            embeddings=vectors,
+            metadatas=[document.metadata for document in documents],
+            ids=ids,
+        )
+        self._ids.update(ids)
+        self.stats["reused"] += reused
+        self.stats["embedded"] += len(ids) - reused
+
+    @property
+    def unchanged(self) -> bool:
+        """Whether this version holds exactly what the live one does."""
+        return (
+            self.live is not None
+            and not self.stats["embedded"]
+            and not self.stats["updated"]
+            and self._ids == self._existing.keys()
+        )
+
+    def verify(self):
+        """Indexes the filter fields and checks the version before it's published."""
+        if not self._ids:
+            raise ValueError("No documents to ingest")
+        self.stats["deleted"] = len(self._existing.keys() - self._ids)
+        _create_filter_indexes(self._client, self.name)
+        _verify(self.vector_store, len(self._ids))
+
+    def publish(self):
+        _point_alias(self._client, self.name)
+        _prune_versions(self._client)
+
+    def discard(self):
+        if self._client.has_collection(self.name):
+            self._client.drop_collection(self.name)
+
+
+def describe_versions() -> Dict:
+    client = _client()
+    return {"live": live_version(client), "versions": list_versions(client)}
+
+
+def export_live_snapshot(directory: str, force: bool = False) -> Optional[str]:
+    """
+    Exports the live version to `directory` unless the snapshot there already
+    is of it, and returns the exported version.
+    """
+    client = _client()
+    live = live_version(client)
+    if live is None:
+        raise ValueError(f"{env.MILVUS_COLLECTION} has no live version to export")
+    if not force and current_snapshot(directory) == live:
+        return None
+    client.load_collection(live)
+    export_snapshot(client, live, directory, env.EMBEDDING_MODEL)
+    return live
+
+
+def rollback(version: Optional[str] = None) -> str:
+    """
+    Points the alias back at `version`, by default the newest version older
+    than the live one, and returns its name.
+    """
+    client = _client()
+    versions = list_versions(client)
+    live = live_version(client)
+    if version is None:
+        older = versions[:versions.index(live)] if live in versions else []
+        if not older:
+            raise ValueError(f"No older version of {env.MILVUS_COLLECTION} to roll back to")
+        version = older[-1]
+    elif version not in versions:
+        raise ValueError(f"Unknown version {version}, expected one of {versions}")
+    client.load_collection(version)
+    _point_alias(client, version)
+    return version
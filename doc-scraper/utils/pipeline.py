@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List
+from langchain_core.embeddings import Embeddings
+from langchain_community.docstore.document import Document
+from langchain_text_splitters import TextSplitter
+from utils.logger import setup_logger
+from utils.milvus import CollectionVersion, assign_chunk_ids
+
+_logger = setup_logger(__name__)
+
+# Marks the end of a stage's output
+_DONE = None
+
+
+class StageMetrics:
+    """Items a stage produced and how long it spent working on them."""
+
+    def __init__(self):
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self):
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+
+    def finish(self):
+        self._finished_at = time.perf_counter()
+
+    def as_dict(self) -> Dict:
+        elapsed = (self._finished_at or time.perf_counter()) - (self._started_at or 0)
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class IngestPipeline:
+    """
+    Streams documents through load -> split -> embed -> insert into a new
+    collection version. Stages are connected by bounded queues, so a slow
+    stage holds the ones before it back and at most `queue_size` batches are
+    in flight between any two stages, however large the corpus.
+
+    Embedding runs on `embed_workers` concurrent workers, each sending
+    `batch_size` chunks per request. Chunks the live version already has
+    reuse its vectors instead.
+    """
+
+    def __init__(
+        self,
+        version: CollectionVersion,
+        embeddings: Embeddings,
+        text_splitter: TextSplitter,
+        batch_size: int = 64,
+        embed_workers: int = 4,
+        queue_size: int = 8,
+    ):
+        self._version = version
+        self._embeddings = embeddings
+        self._text_splitter = text_splitter
+        self._batch_size = batch_size
+        self._embed_workers = embed_workers
+        self._queue_size = queue_size
+        self.metrics = {
+            stage: StageMetrics() for stage in ("load", "split", "embed", "insert")
+        }
+
+    async def run(self, documents: AsyncIterator[Document]) -> Dict[str, Dict]:
+        loaded: asyncio.Queue = asyncio.Queue(self._queue_size)
+        batches: asyncio.Queue = asyncio.Queue(self._queue_size)
+        embedded: asyncio.Queue = asyncio.Queue(self._queue_size)
+        # Any failing stage cancels the others
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._load(documents, loaded))
+            group.create_task(self._split(loaded, batches))
+            for _ in range(self._embed_workers):
+                group.create_task(self._embed(batches, embedded))
+            group.create_task(self._insert(embedded))
+        metrics = {stage: metrics.as_dict() for stage, metrics in self.metrics.items()}
+        _logger.info(f"Ingest pipeline metrics: {metrics}")
+        return metrics
+
+    async def _load(self, documents: AsyncIterator[Document], output: asyncio.Queue):
+        metrics = self.metrics["load"]
+        metrics.start()
+        started = time.perf_counter()
+        async for document in documents:
+            metrics.busy_seconds += time.perf_counter() - started
+            metrics.items += 1
+            await output.put(document)
+            started = time.perf_counter()
+        metrics.finish()
+        await output.put(_DONE)
+
+    async def _split(self, input: asyncio.Queue, output: asyncio.Queue):
+        metrics = self.metrics["split"]
+        ids: List[str] = []
+        chunks: List[Document] = []
+        while (document := await input.get()) is not _DONE:
+            metrics.start()
+            started = time.perf_counter()
+            page_chunks = await asyncio.to_thread(self._text_splitter.split_documents, [document])
+            ids += assign_chunk_ids(page_chunks)
+            chunks += page_chunks
+            metrics.busy_seconds += time.perf_counter() - started
+            metrics.items += len(page_chunks)
+            while len(chunks) >= self._batch_size:
+                await output.put((ids[:self._batch_size], chunks[:self._batch_size]))
+                ids, chunks = ids[self._batch_size:], chunks[self._batch_size:]
+        if chunks:
+            await output.put((ids, chunks))
+        metrics.finish()
+        for _ in range(self._embed_workers):
+            await output.put(_DONE)
+
+    async def _embed(self, input: asyncio.Queue, output: asyncio.Queue):
+        metrics = self.metrics["embed"]
+        while (batch := await input.get()) is not _DONE:
+            metrics.start()
+            started = time.perf_counter()
+            ids, chunks = batch
+            stored = await asyncio.to_thread(self._version.stored_vectors, ids, chunks)
+            missing = [chunk.page_content for id, chunk in zip(ids, chunks) if id not in stored]
+            fresh = iter(await self._embeddings.aembed_documents(missing) if missing else [])
+            vectors = [stored[id] if id in stored else next(fresh) for id in ids]
+            metrics.busy_seconds += time.perf_counter() - started
+            metrics.items += len(ids)
+            await output.put((ids, chunks, vectors, len(stored)))
+        metrics.finish()
+        await output.put(_DONE)
+
+    async def _insert(self, input: asyncio.Queue):
+        metrics = self.metrics["insert"]
+        remaining_workers = self._embed_workers
+        while remaining_workers:
+            item = await input.get()
+            if item is _DONE:
+                remaining_workers -= 1
+                continue
+            metrics.start()
+            started = time.perf_counter()
+            await asyncio.to_thread(self._version.insert, *item)
+            metrics.busy_seconds += time.perf_counter() - started
+            metrics.items += len(item[0])
+        metrics.finish()
@@ -0,0 +1,152 @@
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from pymilvus import MilvusClient
+from utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+# Milvus' BM25 defaults; the standard analyzer splits on word boundaries and lower-cases
+BM25_K1 = 1.2
+BM25_B = 0.75
+TOKEN_PATTERN = r"\w+"
+
+_TEXT_FIELD = "text"
+_PRIMARY_FIELD = "pk"
+_VECTOR_FIELD = "dense"
+# Output of the BM25 function, rebuilt from the text
+_SPARSE_FIELD = "sparse"
+# File naming the snapshot readers load, swapped atomically
+CURRENT = "CURRENT"
+
+
+def _rows(client: MilvusClient, collection_name: str) -> List[Dict]:
+    fields = [
+        field["name"] for field in client.describe_collection(collection_name)["fields"]
+        if field["name"] != _SPARSE_FIELD
+    ]
+    iterator = client.query_iterator(collection_name, batch_size=1000, output_fields=fields)
+    rows = []
+    try:
+        while batch := iterator.next():
+            rows += batch
+    finally:
+        iterator.close()
+    # Stable order, so unchanged collections export identical snapshots
+    return sorted(rows, key=lambda row: row[_PRIMARY_FIELD])
+
+
+def _bm25_postings(texts: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Term -> documents postings in CSR form, each posting holding the term's
+    BM25 weight in that document, so a query only sums up weights.
+    """
+    documents = [Counter(re.findall(TOKEN_PATTERN, text.lower())) for text in texts]
+    lengths = np.array([sum(document.values()) for document in documents], dtype=np.float32)
+    average_length = float(lengths.mean()) or 1.0
+    postings: Dict[str, List] = {}
+    for index, document in enumerate(documents):
+        for term, frequency in document.items():
+            postings.setdefault(term, []).append((index, frequency))
+
+    vocabulary = sorted(postings)
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    docs, weights = [], []
+    for position, term in enumerate(vocabulary):
+        entries = postings[term]
+        idf = math.log(1 + (len(documents) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for index, frequency in entries:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[index] / average_length)
+            docs.append(index)
+            weights.append(idf * frequency * (BM25_K1 + 1) / (frequency + norm))
+        offsets[position + 1] = len(docs)
+    return {
+        "vocabulary": vocabulary,
+        "offsets": offsets,
+        "docs": np.array(docs, dtype=np.int32),
+        "weights": np.array(weights, dtype=np.float32),
+        "average_length": average_length,
+    }
+
+
+def current_snapshot(directory: str) -> Optional[str]:
+    """Version the snapshot directory currently points at."""
+    pointer = Path(directory) / CURRENT
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+def export_snapshot(client: MilvusClient, collection_name: str, directory: str, model: str) -> Path:
+    """
+    Exports a collection version for the MCP server's local backend: the dense
+    vectors as a float32 matrix, a BM25 inverted index over the chunk texts
+    and the chunks with their metadata. The arrays are plain `.npy` files the
+    server memory-maps.
+
+    Each version is written to its own subdirectory and `CURRENT` is only
+    repointed once it's complete, so readers never load a partial snapshot.
+    """
+    rows = _rows(client, collection_name)
+    if not rows:
+        raise ValueError(f"{collection_name} has no chunks to export")
+    root = Path(directory)
+    target = root / collection_name
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir(parents=True)
+
+    dense = np.array([row[_VECTOR_FIELD] for row in rows], dtype=np.float32)
+    np.save(target / "dense.npy", dense)
+    # Squared norms, for the L2 distance Milvus ranks dense vectors by
+    np.save(target / "dense_norms.npy", np.einsum("ij,ij->i", dense, dense))
+
+    texts = [row[_TEXT_FIELD] for row in rows]
+    bm25 = _bm25_postings(texts)
+    np.save(target / "bm25_offsets.npy", bm25["offsets"])
+    np.save(target / "bm25_docs.npy", bm25["docs"])
+    np.save(target / "bm25_weights.npy", bm25["weights"])
+
+    chunks = [
+        {
+            "text": row[_TEXT_FIELD],
+            # Includes `pk`, like the metadata of Milvus search results
+            "metadata": {
+                key: value for key, value in row.items()
+                if key not in (_TEXT_FIELD, _VECTOR_FIELD)
+            },
+        }
+        for row in rows
+    ]
+    (target / "chunks.json").write_text(json.dumps(chunks), encoding="utf-8")
+    manifest = {
+        "version": collection_name,
+        "model": model,
+        "count": len(rows),
+        "dimensions": int(dense.shape[1]),
+        "metric_type": "L2",
+        "fields": sorted({key for chunk in chunks for key in chunk["metadata"]}),
+        "bm25": {
+            "k1": BM25_K1,
+            "b": BM25_B,
+            "token_pattern": TOKEN_PATTERN,
+            "average_length": bm25["average_length"],
+            "vocabulary": bm25["vocabulary"],
+        },
+    }
+    (target / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    previous = current_snapshot(directory)
+    pointer = root / f"{CURRENT}.tmp"
+    pointer.write_text(collection_name)
+    os.replace(pointer, root / CURRENT)
+    _logger.info(f"Exported {len(rows)} chunks of {collection_name} to {target}")
+
+    # Keeps the previous snapshot for servers that haven't reloaded yet
+    for path in root.iterdir():
+        if (path / "manifest.json").exists() and path.name not in (collection_name, previous):
+            shutil.rmtree(path, ignore_errors=True)
+    return target
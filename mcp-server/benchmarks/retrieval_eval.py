@@ -0,0 +1,106 @@
+"""
+Offline retrieval evaluation of `search_mermaid_docs` rankers.
+
+Every query in retrieval_eval.json is labelled with the diagram type, and
+usually a section heading fragment, of the chunks that answer it. A result is
+relevant when its `diagram_type` matches and its section path contains the
+fragment. Reports recall@k, MRR, the average size of a returned chunk (what
+a smaller k saves in LLM context) and search latency percentiles, for the
+ranker configured in `.env` or for several given with --ranker.
+
+Query embeddings are computed in a warm-up pass, so latencies only cover the
+search itself. Uses the configured VECTOR_BACKEND and search params.
+
+Usage (from `mcp-server/`):
+
+    uv run python benchmarks/retrieval_eval.py [--k 1 3 5] [--repeats 5] \\
+        [--ranker weighted:0.6,0.4 --ranker weighted:0.8,0.2 --ranker rrf:60]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+from langchain_community.docstore.document import Document
+from mcp_server.utils.milvus import MilvusManager, Ranker
+
+LABELS = Path(__file__).with_name("retrieval_eval.json")
+
+
+def _ranker(spec: str) -> Ranker:
+    """`weighted:<dense>,<sparse>` or `rrf[:<k>]`."""
+    kind, _, params = spec.partition(":")
+    if kind == "weighted":
+        return Ranker("weighted", {"weights": [float(w) for w in params.split(",")]})
+    if kind == "rrf":
+        return Ranker("rrf", {"k": int(params or 60)})
+    raise argparse.ArgumentTypeError(f"Unknown ranker {spec}")
+
+
+def _relevant(document: Document, label: Dict) -> bool:
+    metadata = document.metadata
+    if metadata.get("diagram_type") != label["diagram_type"]:
+        return False
+    section = metadata.get("section_key") or metadata.get("section", "").lower()
+    return label.get("section", "") in section
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+async def _evaluate(ranker: Ranker, labels: List[Dict], ks: List[int], repeats: int) -> Dict:
+    manager = MilvusManager(ranker=ranker)
+    top = max(ks)
+    results = {}
+    for label in labels:
+        results[label["query"]] = await manager.search(label["query"], k=top)
+
+    latencies = []
+    for _ in range(repeats):
+        for label in labels:
+            start = time.perf_counter()
+            await manager.search(label["query"], k=top)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    ranks = []
+    for label in labels:
+        documents = [document for document, _ in results[label["query"]]]
+        ranks.append(next((i for i, d in enumerate(documents) if _relevant(d, label)), None))
+    chunks = [document.page_content for found in results.values() for document, _ in found]
+    return {
+        "recall": {k: sum(r is not None and r < k for r in ranks) / len(ranks) for k in ks},
+        "mrr": sum(1 / (r + 1) for r in ranks if r is not None) / len(ranks),
+        "chars": statistics.mean(len(chunk) for chunk in chunks) if chunks else 0,
+        "p50": statistics.median(latencies),
+        "p95": _percentile(latencies, 0.95),
+        "p99": _percentile(latencies, 0.99),
+    }
+
+
+async def main(rankers: List[Ranker], ks: List[int], repeats: int):
+    labels = json.loads(LABELS.read_text(encoding="utf-8"))
+    print(f"{len(labels)} labelled queries")
+    recall_header = " ".join(f"{f'R@{k}':>6}" for k in ks)
+    print(f"{'ranker':<22} {recall_header} {'MRR':>6} {'chars':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for ranker in rankers:
+        metrics = await _evaluate(ranker, labels, ks, repeats)
+        name = f"{ranker.type}:{','.join(str(v) for v in ranker.params.get('weights', [ranker.params.get('k')]))}"
+        recall = " ".join(f"{metrics['recall'][k]:>6.2f}" for k in ks)
+        print(
+            f"{name:<22} {recall} {metrics['mrr']:>6.2f} {metrics['chars']:>6.0f} "
+            f"{metrics['p50'] * 1e3:>6.2f}ms {metrics['p95'] * 1e3:>6.2f}ms {metrics['p99'] * 1e3:>6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ranker", type=_ranker, action="append",
+                        help="weighted:<dense>,<sparse> or rrf:<k>, repeatable (default: SEARCH_RANKER)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--repeats", type=int, default=5, help="timed passes over the queries")
+    args = parser.parse_args()
+    asyncio.run(main(args.ranker or [Ranker.from_env()], sorted(args.k), args.repeats))
@@ -0,0 +1,118 @@
+"""
+Compares the in-process Mermaid syntax pre-check with a full `mmdc` run.
+
+Usage (from `mcp-server/`):
+
+    uv run python benchmarks/syntax_check_benchmark.py [--iterations 2000] [--cli-iterations 3]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable, List
+from mcp_server.utils.renderer import RenderError, render_with_cli
+from mcp_server.utils.syntax_check import check_mermaid_syntax
+
+SAMPLES = {
+    "flowchart (valid)": """
+flowchart LR
+    A[Start] --> B{Is it?}
+    B -->|Yes| C[OK]
+    C --> D[Rethink]
+    D --> B
+    B ---->|No| E[End]
+    subgraph one [Group]
+        direction TB
+        a1 -.-> a2
+    end
+""",
+    "flowchart (bad arrow)": """
+flowchart LR
+    A[Start] -> B{Is it?}
+""",
+    "flowchart (missing end)": """
+flowchart TD
+    subgraph one
+        a1 --> a2
+""",
+    "sequence (valid)": """
+sequenceDiagram
+    participant A as Alice
+    A->>+John: Hello John, how are you?
+    loop Healthcheck
+        John->>John: Fight against hypochondria
+    end
+    John-->>-A: Great!
+""",
+    "sequence (bad else)": """
+sequenceDiagram
+    loop Every minute
+        A->>B: ping
+    else
+        A->>B: pong
+    end
+""",
+    "class (unclosed body)": """
+classDiagram
+    class Animal {
+        +String name
+        +eat(food) bool
+""",
+    "state (bad transition)": """
+stateDiagram-v2
+    [*] --> Still
+    Still -> Moving
+""",
+    "unknown header": """
+flowhcart TD
+    A --> B
+""",
+}
+
+
+def _timed(fn: Callable[[], object], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _timed_cli(mermaid_code: str, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            await render_with_cli(mermaid_code, timeout=30)
+        except RenderError:
+            pass
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(iterations: int, cli_iterations: int):
+    print(f"{'diagram':<26} {'pre-check':>12} {'mmdc':>12} {'speed-up':>10}  result")
+    for name, mermaid_code in SAMPLES.items():
+        check = _timed(lambda: check_mermaid_syntax(mermaid_code), iterations)
+        issue = check_mermaid_syntax(mermaid_code)
+        check_us = statistics.median(check) * 1e6
+
+        cli = await _timed_cli(mermaid_code, cli_iterations) if cli_iterations else []
+        if cli:
+            cli_ms = statistics.median(cli) * 1e3
+            cli_text = f"{cli_ms:10.1f}ms"
+            speedup = f"{cli_ms * 1e3 / check_us:9.0f}x"
+        else:
+            cli_text, speedup = f"{'-':>12}", f"{'-':>10}"
+
+        print(f"{name:<26} {check_us:10.1f}us {cli_text} {speedup}  {issue or 'ok'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cli-iterations", type=int, default=3,
+                        help="mmdc runs per diagram, 0 to skip the CLI")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.cli_iterations))
@@ -0,0 +1,111 @@
+"""
+Compares the local snapshot backend with the Milvus collection it was
+exported from: startup time, search latency and how many of the top-k
+results both backends agree on.
+
+Query embeddings are computed once up front, so the latencies are those of
+the searches alone. Needs a snapshot exported by the doc-scraper
+(`SNAPSHOT_DIR`, or `python main.py --export-snapshot`); Milvus is only
+searched with --milvus.
+
+Usage (from `mcp-server/`):
+
+    uv run python benchmarks/vector_backend_benchmark.py --snapshot ../doc-scraper/snapshot [--milvus] [--iterations 200] [--k 3]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List
+from langchain_milvus import Milvus, BM25BuiltInFunction
+from mcp_server.utils.embedding_model import CachedQueryEmbeddings, get_embeddings
+from mcp_server.utils.env import Env
+from mcp_server.utils.local_index import LocalIndex
+from mcp_server.utils.milvus import Ranker
+from mcp_server.utils.ttl_cache import TTLCache
+
+env = Env()
+
+QUERIES = [
+    "flowchart node shapes",
+    "sequence diagram activation",
+    "class diagram relationships",
+    "state diagram composite states",
+    "gantt chart date format",
+    "pie chart show data",
+    "git graph cherry pick",
+    "mindmap icons",
+    "theme variables dark mode",
+    "how to add a link to a node",
+    "subgraph direction",
+    "entity relationship cardinality",
+]
+
+
+def _timed(label: str, search: Callable[[str], List], iterations: int):
+    samples = []
+    for index in range(iterations):
+        query = QUERIES[index % len(QUERIES)]
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<8} p50 {statistics.median(samples) * 1e6:>10.1f}us  p95 {p95 * 1e6:>10.1f}us")
+
+
+def main(snapshot: str, use_milvus: bool, iterations: int, k: int):
+    embeddings = get_embeddings()
+    vectors = {query: embeddings.embed_query(query) for query in QUERIES}
+    ranker = Ranker.from_env()
+
+    start = time.perf_counter()
+    index = LocalIndex(snapshot)
+    print(f"Loaded {index.version} in {(time.perf_counter() - start) * 1e3:.1f}ms")
+
+    def search_local(query: str):
+        return index.search(
+            vectors[query], query, k=k, ranker=ranker.type, ranker_params=ranker.params, fetch_k=env.SEARCH_FETCH_K)
+
+    _timed("local", search_local, iterations)
+    if not use_milvus:
+        return
+
+    cached = CachedQueryEmbeddings(embeddings, TTLCache(len(QUERIES), 3600))
+    for query, vector in vectors.items():
+        cached.cache.put(query, vector)
+    start = time.perf_counter()
+    store = Milvus(
+        embedding_function=cached,
+        builtin_function=BM25BuiltInFunction(),
+        vector_field=["dense", "sparse"],
+        collection_name=env.MILVUS_COLLECTION,
+        connection_args={"uri": env.MILVUS_URI},
+        consistency_level="Strong",
+    )
+
+    def search_milvus(query: str):
+        return store.similarity_search_with_score(
+            query, k=k, fetch_k=max(env.SEARCH_FETCH_K, k), ranker_type=ranker.type, ranker_params=ranker.params)
+
+    search_milvus(QUERIES[0])
+    print(f"Connected to {env.MILVUS_COLLECTION} in {(time.perf_counter() - start) * 1e3:.1f}ms")
+    _timed("milvus", search_milvus, iterations)
+
+    agreed = 0
+    for query in QUERIES:
+        local = {document.metadata["pk"] for document, _ in search_local(query)}
+        remote = {document.metadata["pk"] for document, _ in search_milvus(query)}
+        agreed += len(local & remote)
+    print(f"Top-{k} agreement: {agreed / (k * len(QUERIES)):.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--snapshot", default=env.LOCAL_INDEX_DIR, help="snapshot directory (default: LOCAL_INDEX_DIR)")
+    parser.add_argument("--milvus", action="store_true", help="also search the Milvus collection")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    if not args.snapshot:
+        parser.error("--snapshot or LOCAL_INDEX_DIR is required")
+    main(args.snapshot, args.milvus, args.iterations, args.k)
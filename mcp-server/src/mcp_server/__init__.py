@@ -1,5 +1,11 @@
-from mcp_server.server import mcp
+import uvicorn
+from mcp_server.server import env, mcp, streamable_http_app
 
 
 def main() -> None:
-    mcp.run(transport='streamable-http')
+    uvicorn.run(
+        streamable_http_app(),
+        host=env.HOST,
+        port=env.PORT,
+        log_level=mcp.settings.log_level.lower(),
+    )
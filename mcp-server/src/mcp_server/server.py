@@ -1,14 +1,41 @@
-import base64
 import asyncio
+import base64
 import json
-from pathlib import Path
-import tempfile
-from typing import Dict, List, Literal, Optional, Tuple
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Literal, NamedTuple, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from mcp_server.utils.logger import setup_logger
 from mcp_server.utils.env import Env
-from langchain_community.docstore.document import Document
+from mcp_server.utils.artifact_store import (
+    MIME_TYPES,
+    ArtifactStore,
+    iter_file,
+    parse_byte_range,
+)
 from mcp_server.utils.milvus import MilvusManager
+from mcp_server.utils.packing import pack_results
+from mcp_server.utils.render_cache import RenderCache
+from mcp_server.utils.render_pool import RenderPool
+from mcp_server.utils.renderer import (
+    TRANSIENT_RENDER_ERRORS,
+    RenderError,
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RendererNotFoundError,
+    cli_stats,
+    render_with_cli,
+)
+from mcp_server.utils.syntax_check import check_mermaid_syntax
+
+if TYPE_CHECKING:
+    from langchain_community.docstore.document import Document
 
 env = Env()
 
@@ -21,10 +48,55 @@ mcp = FastMCP(
     port=env.PORT
 )
 
-milvus_manager = MilvusManager()
+render_pool = RenderPool(
+    size=env.RENDER_POOL_SIZE,
+    max_jobs_per_worker=env.RENDER_POOL_MAX_JOBS_PER_WORKER,
+    max_waiters=env.RENDER_POOL_MAX_QUEUE,
+    acquire_timeout=env.RENDER_POOL_ACQUIRE_TIMEOUT,
+    health_check_interval=env.RENDER_POOL_HEALTH_CHECK_INTERVAL,
+    node=env.NODE_BINARY,
+    worker_env=os.environ | {
+        key: value
+        for key, value in {
+            "MERMAID_CLI_ROOT": env.MERMAID_CLI_ROOT,
+            "PUPPETEER_CONFIG_FILE": env.PUPPETEER_CONFIG_FILE,
+        }.items()
+        if value
+    },
+)
+
+render_cache = RenderCache(
+    max_bytes=env.RENDER_CACHE_MAX_BYTES,
+    disk_dir=env.RENDER_CACHE_DIR,
+    disk_max_bytes=env.RENDER_CACHE_DISK_MAX_BYTES,
+)
+
+artifact_store = ArtifactStore(
+    root=env.ARTIFACT_DIR,
+    max_bytes=env.ARTIFACT_MAX_BYTES,
+    ttl_seconds=env.ARTIFACT_TTL_SECONDS,
+)
+
+
+@cache
+def get_milvus_manager() -> MilvusManager:
+    """The search backend, created on first use so importing the server stays cheap."""
+    return MilvusManager()
 
 
-def log_documents(documents_with_score: List[Tuple[Document, float]]):
+RenderOutput = Literal["auto", "inline", "uri"]
+
+# Diagram types the doc-scraper tags chunks with; `general` is the examples
+# page and `config` the configuration and theming pages
+DiagramType = Literal[
+    "flowchart", "sequence", "class", "state", "er", "journey", "gantt", "pie",
+    "quadrant", "requirement", "gitgraph", "c4", "mindmap", "timeline", "zenuml",
+    "sankey", "xychart", "block", "packet", "kanban", "architecture", "radar",
+    "treemap", "general", "config",
+]
+
+
+def log_documents(documents_with_score: List[Tuple["Document", float]]):
     shortened_results = [
         doc.model_dump() | {
             "title":  doc.metadata.get("title"),
@@ -39,22 +111,302 @@ def log_documents(documents_with_score: List[Tuple[Document, float]]):
     )
 
 
+async def _warm_up_search():
+    """Warms search up, retrying with backoff until Milvus is reachable."""
+    delay = 1.0
+    while True:
+        try:
+            await get_milvus_manager().warm_up()
+            return
+        except Exception as e:
+            _logger.warning(f"Search warm-up failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    warm_up = asyncio.create_task(_warm_up_search()) if env.SEARCH_WARM_UP else None
+    try:
+        async with mcp.session_manager.run():
+            yield
+    finally:
+        if warm_up is not None:
+            warm_up.cancel()
+
+
+def streamable_http_app() -> Starlette:
+    """
+    FastMCP's app with search warmed up at startup. FastMCP's own `lifespan`
+    runs per MCP session, so the Starlette one is extended instead.
+    """
+    app = mcp.streamable_http_app()
+    app.router.lifespan_context = lifespan
+    return app
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    readiness = get_milvus_manager().readiness
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@mcp.custom_route("/stats/search-cache", methods=["GET"])
+async def search_cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(get_milvus_manager().cache_stats)
+
+
+@mcp.custom_route("/stats/render-cache", methods=["GET"])
+async def render_cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(render_cache.stats)
+
+
+@mcp.custom_route("/stats/renderer", methods=["GET"])
+async def renderer_stats(request: Request) -> JSONResponse:
+    # `cancelled` counts renders stopped because their tool call was cancelled
+    return JSONResponse({"pool": render_pool.stats, "cli": cli_stats})
+
+
 @mcp.tool(
     name="search_mermaid_docs",
     description=(
         "Search official Mermaid documentation and curated references. "
         "Returns authoritative syntax rules, examples, errors, and limitations. "
-        "Use this tool before generating or validating Mermaid diagrams."
+        "Use this tool before generating or validating Mermaid diagrams. "
+        "Pass `diagram_type` to only search the docs of that diagram type and "
+        "`section` to only search sections whose heading path contains it. "
+        f"`k` is the number of chunks to search for (default {env.SEARCH_K}, "
+        f"at most {env.SEARCH_MAX_K}). Overlapping and adjacent chunks of a page "
+        "are merged and the content is cut to `max_chars` characters "
+        f"(default {env.SEARCH_MAX_CHARS}, about 4 characters per token); each "
+        "result names its source page and section."
     ),
     structured_output=True,
 )
 async def search_mermaid_docs(
-        query: str
+        query: str,
+        diagram_type: Optional[DiagramType] = None,
+        section: Optional[str] = None,
+        k: Optional[int] = None,
+        max_chars: Optional[int] = None,
 ) -> List[Dict]:
-    _logger.debug(f"Query: {query}")
-    documents_with_score = await milvus_manager.query(query, k=3)
+    _logger.debug(f"Query: {query} (diagram_type={diagram_type}, section={section}, k={k})")
+    k = min(max(k or env.SEARCH_K, 1), env.SEARCH_MAX_K)
+    documents_with_score = await get_milvus_manager().query(
+        query, k=k, diagram_type=diagram_type, section=section)
     log_documents(documents_with_score)
-    return [{"content": doc.page_content} for doc, _ in documents_with_score]
+    return pack_results(documents_with_score, max_chars or env.SEARCH_MAX_CHARS)
+
+
+def _precheck(mermaid_code: str) -> None:
+    if not env.SYNTAX_PRECHECK:
+        return
+    issue = check_mermaid_syntax(mermaid_code)
+    if issue is not None:
+        raise RenderError(str(issue))
+
+
+def _render_key(mermaid_code: str, format: str, theme: str, background: str) -> str:
+    return RenderCache.key(mermaid_code, "render", format, theme, background)
+
+
+def _validate_key(mermaid_code: str) -> str:
+    return RenderCache.key(mermaid_code, "validate")
+
+
+def _known_render(
+    mermaid_code: str,
+    format: str,
+    theme: str,
+    background: str,
+) -> Optional[bytes]:
+    """
+    Returns the cached image, raises `RenderError` for diagrams that fail the
+    pre-check, or returns None when the renderer has to be consulted.
+    """
+    _precheck(mermaid_code)
+    return render_cache.get(_render_key(mermaid_code, format, theme, background))
+
+
+def _known_validation(mermaid_code: str) -> Optional[bool]:
+    """
+    Returns True for diagrams known to be valid, raises `RenderError` for
+    ones known to be invalid, or returns None when the renderer has to be
+    consulted.
+    """
+    _precheck(mermaid_code)
+    cached = render_cache.get(_validate_key(mermaid_code))
+    if cached is None:
+        return None
+    # Cached validation results are the error message, empty when valid
+    if cached:
+        raise RenderError(cached.decode("utf-8"))
+    return True
+
+
+def _store_validation(mermaid_code: str, error: Optional[RenderError]):
+    if isinstance(error, TRANSIENT_RENDER_ERRORS):
+        return
+    message = ""
+    if error is not None:
+        message = str(error).strip() or "Unknown Mermaid CLI error"
+    render_cache.put(_validate_key(mermaid_code), message.encode("utf-8"))
+
+
+async def _render(
+    mermaid_code: str,
+    format: str = "svg",
+    theme: str = "default",
+    background: str = "transparent",
+    timeout: float = 8,
+) -> bytes:
+    cached = _known_render(mermaid_code, format, theme, background)
+    if cached is not None:
+        return cached
+
+    if env.RENDER_POOL_SIZE > 0:
+        image_bytes = await render_pool.render(
+            mermaid_code, format, theme, background, timeout)
+    else:
+        image_bytes = await render_with_cli(
+            mermaid_code, format, theme, background, timeout)
+
+    render_cache.put(
+        _render_key(mermaid_code, format, theme, background), image_bytes)
+    return image_bytes
+
+
+async def _validate(mermaid_code: str, timeout: float = 5) -> None:
+    if _known_validation(mermaid_code):
+        return
+
+    try:
+        if env.RENDER_POOL_SIZE > 0:
+            await render_pool.validate(mermaid_code, timeout)
+        else:
+            await render_with_cli(mermaid_code, timeout=timeout)
+    except RenderError as e:
+        _store_validation(mermaid_code, e)
+        raise
+
+    _store_validation(mermaid_code, None)
+
+
+def _validation_result(error: Optional[Exception] = None) -> Dict:
+    if error is None:
+        return {
+            "valid": True,
+            "errors": [],
+            "warnings": [],
+        }
+
+    if isinstance(error, RenderTimeoutError):
+        message = "Mermaid validation timed out"
+    elif isinstance(error, (RendererNotFoundError, RenderPoolBusyError)):
+        _logger.error(str(error))
+        message = str(error)
+    elif isinstance(error, RenderError):
+        message = str(error).strip() or "Unknown Mermaid CLI error"
+    else:
+        _logger.error(
+            "Unexpected error while validating Mermaid diagram", exc_info=error)
+        message = str(error)
+
+    return {
+        "valid": False,
+        "errors": [message],
+        "warnings": [],
+    }
+
+
+def _artifact_uri(artifact_id: str) -> str:
+    base_url = env.PUBLIC_BASE_URL or f"http://{env.HOST}:{env.PORT}"
+    return f"{base_url.rstrip('/')}/artifacts/{artifact_id}"
+
+
+def _render_result(
+    format: str,
+    image_bytes: Optional[bytes] = None,
+    error: Optional[Exception] = None,
+    output: RenderOutput = "auto",
+) -> Dict:
+    if error is None:
+        result = {
+            "success": True,
+            "format": format,
+            "mime_type": MIME_TYPES[format],
+            "size_bytes": len(image_bytes),
+        }
+        if output == "inline" or (
+            output == "auto" and len(image_bytes) <= env.RENDER_INLINE_MAX_BYTES
+        ):
+            return result | {
+                "data_base64": base64.b64encode(image_bytes).decode("utf-8"),
+            }
+        artifact_id = artifact_store.put(image_bytes, format)
+        return result | {
+            "artifact_id": artifact_id,
+            "uri": _artifact_uri(artifact_id),
+        }
+
+    if isinstance(error, RenderTimeoutError):
+        message = "Mermaid rendering timed out"
+    elif isinstance(error, (RendererNotFoundError, RenderPoolBusyError)):
+        _logger.error(str(error))
+        message = str(error)
+    elif isinstance(error, RenderError):
+        message = str(error).strip() or "Mermaid CLI failed to render diagram"
+    else:
+        _logger.error(
+            "Unexpected error while rendering Mermaid diagram", exc_info=error)
+        message = str(error)
+
+    return {
+        "success": False,
+        "error": message
+    }
+
+
+@mcp.custom_route("/artifacts/{artifact_id}", methods=["GET"])
+async def get_artifact(request: Request) -> Response:
+    """
+    Streams a rendered diagram from the artifact store. Supports single
+    byte-range requests; HEAD is answered by Starlette from GET.
+    """
+    artifact_id = request.path_params["artifact_id"]
+    path = artifact_store.path(artifact_id)
+    if path is None:
+        return JSONResponse({"error": "Artifact not found"}, status_code=404)
+
+    size = path.stat().st_size
+    media_type = MIME_TYPES[path.suffix.lstrip(".")]
+    headers = {
+        "Accept-Ranges": "bytes",
+        # Artifact ids are content hashes, so the bytes never change
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{path.stem}"',
+    }
+
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_byte_range(range_header, size)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        iter_file(path, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
 
 
 @mcp.tool(
@@ -67,86 +419,22 @@ async def search_mermaid_docs(
 )
 async def validate_mermaid_diagram(mermaid_code: str) -> Dict:
     """
-    Validate Mermaid diagram by invoking mermaid-cli (mmdc).
+    Validate Mermaid diagram with a warm renderer from the pool.
     """
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-
-        input_file = tmpdir / "diagram.mmd"
-        output_file = tmpdir / "diagram.svg"
-
-        input_file.write_text(mermaid_code, encoding="utf-8")
-
-        cmd = [
-            "mmdc",
-            "-i", str(input_file),
-            "-o", str(output_file),
-            "--quiet"
-        ]
-
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=5
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                return {
-                    "valid": False,
-                    "errors": ["Mermaid validation timed out"],
-                    "warnings": [],
-                }
-
-            if process.returncode == 0:
-                return {
-                    "valid": True,
-                    "errors": [],
-                    "warnings": [],
-                }
-
-            # Mermaid CLI writes all syntax errors to stderr
-            error_message = stderr.decode("utf-8").strip()
-
-            return {
-                "valid": False,
-                "errors": [error_message] if error_message else ["Unknown Mermaid CLI error"],
-                "warnings": [],
-            }
-
-        except FileNotFoundError:
-            _logger.error("Mermaid CLI (mmdc) not found")
-
-            return {
-                "valid": False,
-                "errors": [
-                    "Mermaid CLI (mmdc) is not installed or not available in PATH"
-                ],
-                "warnings": [],
-            }
-
-        except Exception as e:
-            _logger.exception(
-                "Unexpected error while validating Mermaid diagram")
-
-            return {
-                "valid": False,
-                "errors": [str(e)],
-                "warnings": [],
-            }
+    try:
+        await _validate(mermaid_code, timeout=5)
+        return _validation_result()
+    except Exception as e:
+        return _validation_result(e)
 
 
 @mcp.tool(
     name="render_mermaid_diagram",
     description=(
-        "Render a Mermaid diagram into an image (SVG or PNG) using Mermaid CLI. "
-        "Returns a base64-encoded image suitable for embedding in Markdown."
+        "Render a Mermaid diagram into an image (SVG, PNG or PDF) using Mermaid CLI. "
+        "Small images are returned base64-encoded, suitable for embedding in Markdown; "
+        "larger ones (or output='uri') are returned as a download URI."
     ),
     structured_output=True,
 )
@@ -156,9 +444,10 @@ async def render_mermaid_diagram(
     theme: Literal["default", "dark", "neutral", "forest"] = "default",
     background: Literal["transparent", "white"] = "transparent",
     timeout_seconds: int = 8,
+    output: RenderOutput = "auto",
 ) -> Dict:
     """
-    Render Mermaid diagram via mermaid-cli (mmdc).
+    Render Mermaid diagram with a warm renderer from the pool.
     """
 
     if format not in {"svg", "png", "pdf"}:
@@ -167,78 +456,208 @@ async def render_mermaid_diagram(
             "error": f"Unsupported format '{format}'. Use 'svg', 'png' or 'pdf'."
         }
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
+    try:
+        image_bytes = await _render(
+            mermaid_code, format, theme, background, timeout_seconds)
+        return _render_result(format, image_bytes, output=output)
+    except Exception as e:
+        return _render_result(format, error=e)
 
-        input_file = tmpdir / "diagram.mmd"
-        output_file = tmpdir / f"diagram.{format}"
 
-        input_file.write_text(mermaid_code, encoding="utf-8")
+class RenderRequest(BaseModel):
+    mermaid_code: str
+    format: Literal["svg", "png", "pdf"] = "svg"
+    theme: Literal["default", "dark", "neutral", "forest"] = "default"
+    background: Literal["transparent", "white"] = "transparent"
 
-        cmd = [
-            "mmdc",
-            "-i", str(input_file),
-            "-o", str(output_file),
-            "--quiet",
-        ]
 
-        # Optional rendering tweaks
-        if theme:
-            cmd.extend(["-t", theme])
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
 
-        if background != "transparent":
-            cmd.extend(["-b", background])
 
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+def _check_batch_size(items: List) -> None:
+    if len(items) > env.BATCH_MAX_ITEMS:
+        raise ValueError(
+            f"Batch of {len(items)} diagrams exceeds the limit of {env.BATCH_MAX_ITEMS}")
+
 
+def _chunks(indexes: List[int], count: int) -> List[List[int]]:
+    if not indexes:
+        return []
+    count = max(1, min(count, len(indexes)))
+    size = -(-len(indexes) // count)
+    return [indexes[i:i + size] for i in range(0, len(indexes), size)]
+
+
+class JobOutcome(NamedTuple):
+    image_bytes: Optional[bytes]
+    error: Optional[Exception]
+    elapsed_ms: float
+    # Whether the error is the renderer's verdict on the diagram, rather than
+    # a failure of the batch it was sent in
+    verdict: bool = False
+
+
+async def _run_batch(
+    jobs: Dict[int, Dict],
+    max_concurrency: int,
+    run_one: Callable[[Dict], Awaitable[Optional[bytes]]],
+    timeout: float,
+) -> Dict[int, JobOutcome]:
+    """
+    Runs renderer jobs with at most `max_concurrency` in flight and returns
+    a `JobOutcome` per job index.
+
+    With the render pool each group of jobs is a single round trip to one
+    warm worker; otherwise every job is a separate `mmdc` run.
+    """
+    outcomes: Dict[int, JobOutcome] = {}
+    if not jobs:
+        return outcomes
+    concurrency = max(1, min(max_concurrency, env.BATCH_MAX_CONCURRENCY))
+
+    if env.RENDER_POOL_SIZE > 0:
+        async def run_group(group: List[int]):
+            started = time.perf_counter()
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=timeout_seconds
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                return {
-                    "success": False,
-                    "error": "Mermaid rendering timed out"
-                }
-
-            if process.returncode != 0:
-                error_message = stderr.decode("utf-8").strip()
-                return {
-                    "success": False,
-                    "error": error_message or "Mermaid CLI failed to render diagram"
-                }
-
-            # Read rendered image
-            image_bytes = output_file.read_bytes()
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
-            return {
-                "success": True,
-                "format": format,
-                "mime_type": (
-                    "image/svg+xml" if format == "svg" else "image/png"
-                ),
-                "data_base64": image_base64,
-            }
+                responses = await render_pool.run_batch(
+                    [jobs[index] for index in group], timeout * len(group))
+            except Exception as e:
+                for index in group:
+                    outcomes[index] = JobOutcome(None, e, _elapsed_ms(started))
+                return
+            for index, response in zip(group, responses):
+                elapsed = round(response.get("elapsed_ms", 0), 3)
+                if response.get("ok"):
+                    data = response.get("data")
+                    outcomes[index] = JobOutcome(
+                        base64.b64decode(data) if data else None, None, elapsed)
+                else:
+                    error = RenderError(
+                        response.get("error") or "Mermaid renderer failed to render diagram")
+                    outcomes[index] = JobOutcome(None, error, elapsed, verdict=True)
+
+        groups = _chunks(list(jobs), min(concurrency, env.RENDER_POOL_SIZE))
+        await asyncio.gather(*(run_group(group) for group in groups))
+        return outcomes
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                outcomes[index] = JobOutcome(
+                    await run_one(jobs[index]), None, _elapsed_ms(started))
+            except Exception as e:
+                # `mmdc` failing is its verdict, as for a single diagram
+                outcomes[index] = JobOutcome(
+                    None, e, _elapsed_ms(started), verdict=isinstance(e, RenderError))
 
-        except FileNotFoundError:
-            _logger.error("Mermaid CLI (mmdc) not found")
-            return {
-                "success": False,
-                "error": "Mermaid CLI (mmdc) is not installed or not in PATH"
-            }
+    await asyncio.gather(*(run(index) for index in jobs))
+    return outcomes
+
+
+@mcp.tool(
+    name="validate_mermaid_diagrams",
+    description=(
+        "Validate many Mermaid diagrams in one call. "
+        "Returns one result per diagram, in input order, with validity, "
+        "CLI error messages and timing."
+    ),
+    structured_output=True,
+)
+async def validate_mermaid_diagrams(
+    diagrams: List[str],
+    max_concurrency: int = 4,
+) -> List[Dict]:
+    """
+    Validate a batch of Mermaid diagrams concurrently.
+    """
+
+    _check_batch_size(diagrams)
+    results: List[Optional[Dict]] = [None] * len(diagrams)
+    jobs: Dict[int, Dict] = {}
 
+    for index, mermaid_code in enumerate(diagrams):
+        started = time.perf_counter()
+        try:
+            if _known_validation(mermaid_code):
+                results[index] = _validation_result()
+            else:
+                jobs[index] = RenderPool.validate_job(mermaid_code)
+                continue
         except Exception as e:
-            _logger.exception(
-                "Unexpected error while rendering Mermaid diagram")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            results[index] = _validation_result(e)
+        results[index] |= {"elapsed_ms": _elapsed_ms(started)}
+
+    async def run_one(job: Dict) -> None:
+        await render_with_cli(job["code"], timeout=5)
+
+    outcomes = await _run_batch(jobs, max_concurrency, run_one, timeout=5)
+    for index, (_, error, elapsed, verdict) in outcomes.items():
+        if error is None or verdict:
+            _store_validation(diagrams[index], error)
+        results[index] = _validation_result(error) | {"elapsed_ms": elapsed}
+
+    return [{"index": index} | result for index, result in enumerate(results)]
+
+
+@mcp.tool(
+    name="render_mermaid_diagrams",
+    description=(
+        "Render many Mermaid diagrams into images (SVG, PNG or PDF) in one call. "
+        "Returns one result per diagram, in input order, with the base64-encoded "
+        "image (or a download URI for large images) or an error, and timing."
+    ),
+    structured_output=True,
+)
+async def render_mermaid_diagrams(
+    diagrams: List[RenderRequest],
+    max_concurrency: int = 4,
+    timeout_seconds: int = 8,
+    output: RenderOutput = "auto",
+) -> List[Dict]:
+    """
+    Render a batch of Mermaid diagrams concurrently.
+    """
+
+    _check_batch_size(diagrams)
+    results: List[Optional[Dict]] = [None] * len(diagrams)
+    jobs: Dict[int, Dict] = {}
+
+    for index, diagram in enumerate(diagrams):
+        started = time.perf_counter()
+        try:
+            image_bytes = _known_render(
+                diagram.mermaid_code, diagram.format, diagram.theme, diagram.background)
+            if image_bytes is None:
+                jobs[index] = RenderPool.render_job(
+                    diagram.mermaid_code, diagram.format, diagram.theme, diagram.background)
+                continue
+            results[index] = _render_result(
+                diagram.format, image_bytes, output=output)
+        except Exception as e:
+            results[index] = _render_result(diagram.format, error=e)
+        results[index] |= {"elapsed_ms": _elapsed_ms(started)}
+
+    async def run_one(job: Dict) -> bytes:
+        return await render_with_cli(
+            job["code"], job["format"], job["theme"], job["background"], timeout_seconds)
+
+    outcomes = await _run_batch(jobs, max_concurrency, run_one, timeout_seconds)
+    for index, (image_bytes, error, elapsed, _) in outcomes.items():
+        diagram = diagrams[index]
+        try:
+            results[index] = _render_result(diagram.format, image_bytes, error, output)
+            if error is None:
+                render_cache.put(
+                    _render_key(diagram.mermaid_code, diagram.format,
+                                diagram.theme, diagram.background),
+                    image_bytes,
+                )
+        except Exception as e:
+            results[index] = _render_result(diagram.format, error=e)
+        results[index] |= {"elapsed_ms": elapsed}
+
+    return [{"index": index} | result for index, result in enumerate(results)]
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from mcp_server.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+MIME_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+_ARTIFACT_ID = re.compile(r"[0-9a-f]{64}\.(svg|png|pdf)")
+_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class ArtifactStore:
+    """
+    Local, content-addressed store for rendered diagrams, served over HTTP
+    instead of inlining large images into tool results.
+
+    Artifacts expire `ttl_seconds` after they were last written and the
+    oldest ones are removed once the store grows past `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: float = 24 * 60 * 60,
+        prune_interval: float = 60,
+    ):
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._prune_interval = prune_interval
+        self._last_prune = 0.0
+
+    def put(self, data: bytes, format: str) -> str:
+        artifact_id = f"{hashlib.sha256(data).hexdigest()}.{format}"
+        path = self._root / artifact_id
+        if path.exists():
+            os.utime(path)
+        else:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        self._maybe_prune()
+        return artifact_id
+
+    def path(self, artifact_id: str) -> Optional[Path]:
+        if not _ARTIFACT_ID.fullmatch(artifact_id):
+            return None
+        path = self._root / artifact_id
+        return path if path.is_file() else None
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < self._prune_interval:
+            return
+        self._last_prune = now
+
+        files = []
+        for path in self._root.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self._ttl_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        _logger.debug(f"Artifact store at {self._root}: {total} bytes")
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range: bytes=...` header into an inclusive
+    `(start, end)` pair, or returns None when it can't be satisfied.
+    """
+    match = _BYTE_RANGE.fullmatch(header.strip().split(",")[0].strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # `bytes=-500` is the last 500 bytes, and `bytes=-0` none at all
+        if int(end) == 0:
+            return None
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def iter_file(path: Path, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with path.open("rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -1,14 +1,60 @@
-
-from langchain_ollama import OllamaEmbeddings
+from functools import cache
+from typing import List
+from langchain_core.embeddings import Embeddings
 from mcp_server.utils.env import Env
 from mcp_server.utils.logger import setup_logger
+from mcp_server.utils.ttl_cache import TTLCache
 
 env = Env()
 
 _logger = setup_logger(__name__)
 
-_logger.debug(
-    f"Initiating Ollama Embedding Model with id: {env.EMBEDDING_MODEL}")
-embeddings = OllamaEmbeddings(model=env.EMBEDDING_MODEL)
-_logger.debug(
-    f"Initiated successfully")
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an embedding model and caches query embeddings by normalized text.
+    Document embeddings are passed through untouched.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: TTLCache):
+        self._embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = self._embeddings.embed_query(text)
+            self.cache.put(key, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = await self._embeddings.aembed_query(text)
+            self.cache.put(key, embedding)
+        return embedding
+
+
+@cache
+def get_embeddings() -> Embeddings:
+    """The Ollama embedding model, created (and langchain_ollama imported) on first use."""
+    from langchain_ollama import OllamaEmbeddings
+
+    _logger.debug(
+        f"Initiating Ollama Embedding Model with id: {env.EMBEDDING_MODEL}")
+    embeddings = OllamaEmbeddings(model=env.EMBEDDING_MODEL)
+    _logger.debug(
+        f"Initiated successfully")
+    return embeddings
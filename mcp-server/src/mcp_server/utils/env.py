@@ -1,3 +1,6 @@
+import os
+import tempfile
+from typing import Any, Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,7 +9,83 @@ class Env(BaseSettings):
     PORT: int
 
     EMBEDDING_MODEL: str
-    MILVUS_URI: str
+    # `milvus` searches the Milvus collection, `local` an in-process index
+    # loaded from the snapshot the doc-scraper exports to LOCAL_INDEX_DIR
+    VECTOR_BACKEND: Literal["milvus", "local"] = "milvus"
+    LOCAL_INDEX_DIR: Optional[str] = None
+    # Required by the milvus backend
+    MILVUS_URI: Optional[str] = None
+    # Alias the doc-scraper repoints at each new version of the docs
+    MILVUS_COLLECTION: str = "mermaid_docs"
+
+    # Dedicated Milvus connections searches are spread over; a search waits up
+    # to MILVUS_POOL_ACQUIRE_TIMEOUT for a free one
+    MILVUS_POOL_SIZE: int = 4
+    MILVUS_POOL_ACQUIRE_TIMEOUT: float = 5
+    MILVUS_CONNECT_TIMEOUT: float = 10
+    MILVUS_SEARCH_TIMEOUT: float = 10
+    # Connect, load the collection and run a priming search at startup, so
+    # the first request doesn't pay for it; /ready reports when it's done,
+    # or reports ready from the start when warm-up is off
+    SEARCH_WARM_UP: bool = True
+    SEARCH_WARM_UP_QUERY: str = "flowchart mermaid"
+
+    # Search caches; results are also dropped when the collection changes.
+    # Set RESULT_CACHE_SIMILARITY_THRESHOLD (cosine, e.g. 0.97) to also reuse
+    # results of near-duplicate queries.
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
+    RESULT_CACHE_SIZE: int = 256
+    QUERY_CACHE_TTL_SECONDS: float = 60 * 60
+    RESULT_CACHE_SIMILARITY_THRESHOLD: Optional[float] = None
+    COLLECTION_VERSION_CHECK_INTERVAL: float = 30
+
+    # Hybrid search: `weighted` combines the normalized dense and BM25 scores
+    # with SEARCH_WEIGHTS, `rrf` their reciprocal ranks with SEARCH_RRF_K
+    SEARCH_RANKER: Literal["weighted", "rrf"] = "weighted"
+    SEARCH_WEIGHTS: List[float] = [0.6, 0.4]
+    SEARCH_RRF_K: int = 60
+    # Chunks search_mermaid_docs returns unless the caller asks for up to
+    # SEARCH_MAX_K, and the candidates each route contributes (at least k)
+    SEARCH_K: int = 3
+    SEARCH_MAX_K: int = 10
+    SEARCH_FETCH_K: int = 4
+    # Characters of content search_mermaid_docs returns unless the caller sets
+    # a budget, after merging overlapping and adjacent chunks (~4 per token)
+    SEARCH_MAX_CHARS: int = 6000
+    # Extra search params of the dense and sparse index, e.g. {"ef": 64} for
+    # HNSW or {"nprobe": 16} for IVF; the local backend searches exhaustively
+    SEARCH_DENSE_PARAMS: Dict[str, Any] = {}
+    SEARCH_SPARSE_PARAMS: Dict[str, Any] = {}
+
+    # Warm Mermaid renderers; 0 falls back to spawning `mmdc` per call
+    RENDER_POOL_SIZE: int = 2
+    RENDER_POOL_MAX_JOBS_PER_WORKER: int = 200
+    RENDER_POOL_MAX_QUEUE: int = 32
+    RENDER_POOL_ACQUIRE_TIMEOUT: float = 10
+    RENDER_POOL_HEALTH_CHECK_INTERVAL: float = 30
+    NODE_BINARY: str = "node"
+    MERMAID_CLI_ROOT: Optional[str] = None
+    PUPPETEER_CONFIG_FILE: Optional[str] = None
+
+    # Renders above RENDER_INLINE_MAX_BYTES are returned as a URI to the
+    # artifact store instead of inline base64
+    RENDER_INLINE_MAX_BYTES: int = 256 * 1024
+    ARTIFACT_DIR: str = os.path.join(tempfile.gettempdir(), "mermaid-mcp-artifacts")
+    ARTIFACT_MAX_BYTES: int = 1024 * 1024 * 1024
+    ARTIFACT_TTL_SECONDS: float = 24 * 60 * 60
+    PUBLIC_BASE_URL: Optional[str] = None
+
+    # Batch validate/render tools
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Reject obviously malformed diagrams before they reach the renderer
+    SYNTAX_PRECHECK: bool = True
+
+    # Render/validation result cache; the disk tier is off unless a dir is set
+    RENDER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RENDER_CACHE_DIR: Optional[str] = None
+    RENDER_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
 
     model_config = SettingsConfigDict(
         env_file=".env"
@@ -0,0 +1,133 @@
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_community.docstore.document import Document
+from mcp_server.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+# File in the snapshot directory naming the current version
+_CURRENT = "CURRENT"
+
+
+def _top(scores: np.ndarray, valid: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the `n` best valid scores, in no particular order."""
+    candidates = np.flatnonzero(valid)
+    if len(candidates) > n:
+        candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+    return candidates
+
+
+class LocalIndex:
+    """
+    In-process stand-in for the Milvus collection, loaded from a snapshot the
+    doc-scraper exports (`SNAPSHOT_DIR`): a dense float32 matrix and a BM25
+    inverted index, both memory-mapped, plus the chunks and their metadata.
+
+    Searches mirror the Milvus hybrid search: each route contributes its
+    `fetch_k` best chunks, which are fused by reciprocal rank (`rrf`) or
+    by their dense L2 distances and BM25 scores, normalized the way Milvus
+    does, and the route weights (`weighted`).
+    """
+
+    def __init__(self, directory: str):
+        self.version = self.current_version(directory)
+        if self.version is None:
+            raise FileNotFoundError(f"No snapshot in {directory}, export one with the doc-scraper")
+        path = Path(directory) / self.version
+        manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        self.model: str = manifest["model"]
+        self.fields: List[str] = manifest["fields"]
+
+        self._dense = np.load(path / "dense.npy", mmap_mode="r")
+        self._dense_norms = np.load(path / "dense_norms.npy", mmap_mode="r")
+        bm25 = manifest["bm25"]
+        self._token_pattern = re.compile(bm25["token_pattern"])
+        self._terms = {term: index for index, term in enumerate(bm25["vocabulary"])}
+        self._offsets = np.load(path / "bm25_offsets.npy", mmap_mode="r")
+        self._docs = np.load(path / "bm25_docs.npy", mmap_mode="r")
+        self._weights = np.load(path / "bm25_weights.npy", mmap_mode="r")
+
+        chunks = json.loads((path / "chunks.json").read_text(encoding="utf-8"))
+        self._documents = [
+            Document(page_content=chunk["text"], metadata=chunk["metadata"]) for chunk in chunks
+        ]
+        self._diagram_types = np.array(
+            [chunk["metadata"].get("diagram_type", "") for chunk in chunks])
+        self._section_keys = [chunk["metadata"].get("section_key", "") for chunk in chunks]
+        _logger.info(f"Loaded {len(chunks)} chunks of {self.version} from {path}")
+
+    @staticmethod
+    def current_version(directory: str) -> Optional[str]:
+        pointer = Path(directory) / _CURRENT
+        return pointer.read_text().strip() if pointer.exists() else None
+
+    def filter_mask(self, diagram_type: Optional[str], section_term: str) -> Optional[np.ndarray]:
+        """Chunks of `diagram_type` whose section path contains `section_term`."""
+        if not diagram_type and not section_term:
+            return None
+        mask = np.ones(len(self._documents), dtype=bool)
+        if diagram_type:
+            mask &= self._diagram_types == diagram_type
+        if section_term:
+            mask &= np.fromiter(
+                (section_term in key for key in self._section_keys), dtype=bool, count=len(mask))
+        return mask
+
+    def _bm25(self, text: str) -> np.ndarray:
+        scores = np.zeros(len(self._documents), dtype=np.float32)
+        for term, count in Counter(self._token_pattern.findall(text.lower())).items():
+            index = self._terms.get(term)
+            if index is not None:
+                start, end = self._offsets[index], self._offsets[index + 1]
+                scores[self._docs[start:end]] += count * self._weights[start:end]
+        return scores
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        k: int = 4,
+        ranker: str = "weighted",
+        ranker_params: Optional[Dict] = None,
+        fetch_k: int = 4,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape[0] != self._dense.shape[1]:
+            raise ValueError(
+                f"Query embedding has {query.shape[0]} dimensions, {self.version} has {self._dense.shape[1]}")
+        valid = np.ones(len(self._documents), dtype=bool) if mask is None else mask
+        # At least k per route, so a search never returns fewer than Milvus would
+        limit = max(fetch_k, k)
+
+        # Squared L2 distance, as Milvus reports it, and its normalization
+        distances = np.maximum(self._dense_norms - 2 * (self._dense @ query) + query @ query, 0)
+        dense = 1 - 2 / np.pi * np.arctan(distances)
+        # BM25 scores are unbounded, Milvus maps them to [0, 1) the same way
+        sparse = 2 / np.pi * np.arctan(self._bm25(text))
+        routes = [
+            (dense, _top(dense, valid, limit)),
+            (sparse, _top(sparse, valid & (sparse > 0), limit)),
+        ]
+
+        params = ranker_params or {}
+        fused: Dict[int, float] = {}
+        if ranker == "rrf":
+            rrf_k = params.get("k", 60)
+            for scores, candidates in routes:
+                ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+                for rank, index in enumerate(ranked, start=1):
+                    fused[int(index)] = fused.get(int(index), 0.0) + 1 / (rrf_k + rank)
+        elif ranker == "weighted":
+            weights = params.get("weights", [1.0, 1.0])
+            for weight, (scores, candidates) in zip(weights, routes):
+                for index in candidates:
+                    fused[int(index)] = fused.get(int(index), 0.0) + weight * float(scores[index])
+        else:
+            raise ValueError(f"Unknown ranker {ranker}, expected weighted or rrf")
+        ranked = sorted(fused.items(), key=lambda item: -item[1])[:k]
+        return [(self._documents[index], score) for index, score in ranked]
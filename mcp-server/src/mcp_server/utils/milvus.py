@@ -1,30 +1,404 @@
+import asyncio
+import json
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 from mcp_server.utils.env import Env
-from langchain_milvus import Milvus, BM25BuiltInFunction
-from mcp_server.utils.embedding_model import embeddings
+from mcp_server.utils.logger import setup_logger
+from mcp_server.utils.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_community.docstore.document import Document
+    from langchain_milvus import Milvus
+    from mcp_server.utils.embedding_model import CachedQueryEmbeddings
 
 env = Env()
 
+_logger = setup_logger(__name__)
+
+# Scalar-indexed metadata written by the doc-scraper
+_FILTER_FIELDS = ["diagram_type", "section_key"]
+
+
+class Ranker(NamedTuple):
+    """How the hybrid search fuses its dense and BM25 results."""
+    type: str
+    params: Dict
+
+    @classmethod
+    def from_env(cls) -> "Ranker":
+        if env.SEARCH_RANKER == "rrf":
+            return cls("rrf", {"k": env.SEARCH_RRF_K})
+        return cls("weighted", {"weights": env.SEARCH_WEIGHTS})
+
+
+def section_term(section: Optional[str]) -> str:
+    """Lower-cased section filter without LIKE wildcards or quotes."""
+    return re.sub(r"[%_\\\"]", " ", (section or "").lower()).strip()
+
+
+def filter_expr(diagram_type: Optional[str] = None, section: Optional[str] = None) -> str:
+    """
+    Milvus expression over the metadata the doc-scraper indexes: an exact
+    diagram type and a case-insensitive substring of the section path.
+    """
+    parts = []
+    if diagram_type:
+        parts.append(f"diagram_type == {json.dumps(diagram_type)}")
+    # Without LIKE wildcards and anything that could end the string literal
+    if term := section_term(section):
+        parts.append(f'section_key like "%{term}%"')
+    return " and ".join(parts)
+
+
+class MilvusPoolBusyError(RuntimeError):
+    """Raised when no pooled Milvus connection frees up in time."""
+
+
+class VectorStorePool:
+    """
+    Fixed set of Milvus vector stores, each on its own connection, handed
+    out to one search at a time. Searches beyond the pool size wait up to
+    `acquire_timeout` for a free one instead of piling onto one channel.
+    """
+
+    def __init__(self, stores: List["Milvus"], acquire_timeout: float):
+        self.stores = stores
+        self._acquire_timeout = acquire_timeout
+        self._idle: asyncio.Queue["Milvus"] = asyncio.Queue()
+        for store in stores:
+            self._idle.put_nowait(store)
+        self._waiting = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "size": len(self.stores),
+            "idle": self._idle.qsize(),
+            "waiting": self._waiting,
+        }
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator["Milvus"]:
+        self._waiting += 1
+        try:
+            store = await asyncio.wait_for(self._idle.get(), self._acquire_timeout)
+        except asyncio.TimeoutError:
+            raise MilvusPoolBusyError(
+                f"All {len(self.stores)} Milvus connections are busy, try again later") from None
+        finally:
+            self._waiting -= 1
+        try:
+            yield store
+        finally:
+            self._idle.put_nowait(store)
+
+    async def close(self):
+        """Closes every connection once the searches using them are done."""
+        for _ in self.stores:
+            store = await self._idle.get()
+            store.client.close()
+            await store.aclient.close()
+
+
+def _unit(vector: List[float]) -> "np.ndarray":
+    import numpy as np
+
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
 
 class MilvusManager:
 
-    def __init__(self):
+    def __init__(self, ranker: Optional[Ranker] = None):
         self._vector_store = None
+        self._pool: Optional[VectorStorePool] = None
+        self._init_lock = asyncio.Lock()
+        self._closing: set = set()
+        self._ranker = ranker or Ranker.from_env()
+        # Set once the warm-up went through, see `readiness`
+        self._warmed_up_at: Optional[float] = None
+        # Set by the first search that went through, warmed up or not
+        self._searched_at: Optional[float] = None
+        self._warm_up_seconds: Optional[float] = None
+        self._warm_up_error: Optional[str] = None
+        self._query_embeddings = TTLCache(
+            env.QUERY_EMBEDDING_CACHE_SIZE, env.QUERY_CACHE_TTL_SECONDS)
+        # Wraps the embedding model once `init` created it
+        self._embeddings: Optional["CachedQueryEmbeddings"] = None
+        # (normalized query, k, filter expression) -> (unit query embedding or None, results)
+        self._results = TTLCache(
+            env.RESULT_CACHE_SIZE, env.QUERY_CACHE_TTL_SECONDS)
+        self._collection_version: Optional[str] = None
+        self._version_checked_at = 0.0
+
+    @property
+    def cache_stats(self) -> Dict:
+        return {
+            "query_embeddings": self._query_embeddings.stats,
+            "results": self._results.stats,
+        }
 
     def init(self):
-        self._vector_store = Milvus(
-            embedding_function=embeddings,
+        if self._embeddings is None:
+            # Imports langchain, slow enough to be kept off the event loop like connecting
+            from mcp_server.utils.embedding_model import CachedQueryEmbeddings, get_embeddings
+
+            self._embeddings = CachedQueryEmbeddings(get_embeddings(), self._query_embeddings)
+        if env.VECTOR_BACKEND == "local":
+            if not env.LOCAL_INDEX_DIR:
+                raise ValueError("Set LOCAL_INDEX_DIR to use the local vector backend")
+            from mcp_server.utils.local_index import LocalIndex
+
+            index = LocalIndex(env.LOCAL_INDEX_DIR)
+            if index.model != env.EMBEDDING_MODEL:
+                raise ValueError(
+                    f"Snapshot {index.version} was embedded with {index.model}, not {env.EMBEDDING_MODEL}")
+            self._vector_store = index
+            return
+        if not env.MILVUS_URI:
+            raise ValueError("Set MILVUS_URI, or VECTOR_BACKEND=local to search a snapshot")
+        stores = [self._connect() for _ in range(max(env.MILVUS_POOL_SIZE, 1))]
+        self._pool = VectorStorePool(stores, env.MILVUS_POOL_ACQUIRE_TIMEOUT)
+        self._vector_store = stores[0]
+
+    def _connect(self) -> "Milvus":
+        # pymilvus pulls in pandas, so it's only imported once search is used
+        from langchain_milvus import Milvus, BM25BuiltInFunction
+
+        return Milvus(
+            embedding_function=self._embeddings,
             builtin_function=BM25BuiltInFunction(),
             # `dense` is for Ollama embeddings, `sparse` is the output field of BM25 function
             vector_field=["dense", "sparse"],
+            collection_name=env.MILVUS_COLLECTION,
             connection_args={
                 "uri": env.MILVUS_URI,
+                "timeout": env.MILVUS_CONNECT_TIMEOUT,
+                # Otherwise every client shares one channel per URI
+                "dedicated": True,
             },
             consistency_level="Strong",
         )
 
-    async def query(self, query: str, k: int = 4):
+    async def warm_up(self):
+        """
+        Connects the pool, loads the collection into memory and primes every
+        connection (and the embedding model) with a search.
+        """
+        started = time.perf_counter()
+        try:
+            await self._ready()
+            if self._pool is not None:
+                await asyncio.to_thread(
+                    self._vector_store.client.load_collection, self._vector_store.collection_name)
+            priming = len(self._pool.stores) if self._pool is not None else 1
+            # Concurrent, so each search takes a different connection
+            results = await asyncio.gather(
+                *(self.search(env.SEARCH_WARM_UP_QUERY, k=1) for _ in range(priming)))
+        except Exception as e:
+            self._warm_up_error = str(e) or type(e).__name__
+            raise
+        if not results[0]:
+            _logger.warning(f"Priming search for {env.SEARCH_WARM_UP_QUERY!r} found nothing")
+        self._warm_up_seconds = time.perf_counter() - started
+        self._warmed_up_at = time.time()
+        self._warm_up_error = None
+        _logger.info(f"Search warmed up in {self._warm_up_seconds:.2f}s")
+
+    @property
+    def readiness(self) -> Dict:
+        """
+        Ready once warmed up or once a search went through. Without warm-up
+        (SEARCH_WARM_UP=false) search initializes lazily on first use, so
+        the server is ready from the start.
+        """
+        if not env.SEARCH_WARM_UP:
+            warm_up = "disabled"
+        elif self._warmed_up_at is not None:
+            warm_up = "done"
+        else:
+            warm_up = "pending"
+        return {
+            "ready": warm_up != "pending" or self._searched_at is not None,
+            "backend": env.VECTOR_BACKEND,
+            "warm_up": warm_up,
+            "warmed_up_at": self._warmed_up_at,
+            "warm_up_seconds": self._warm_up_seconds,
+            "error": self._warm_up_error,
+            "pool": self._pool.stats if self._pool is not None else None,
+        }
+
+    async def _ready(self):
         if self._vector_store is None:
-            self.init()
-        return await self._vector_store.asimilarity_search_with_score(
-            query, k=k, ranker_type="weighted", ranker_params={"weights": [0.6, 0.4]}
+            # Concurrent first searches would each connect a pool
+            async with self._init_lock:
+                if self._vector_store is None:
+                    await asyncio.to_thread(self.init)
+        await self._check_collection_version()
+
+    def _filter(self, diagram_type: Optional[str], section: Optional[str]) -> str:
+        expr = filter_expr(diagram_type, section)
+        if expr and not set(_FILTER_FIELDS) <= set(self._vector_store.fields):
+            _logger.warning("Collection predates the filter fields, searching unfiltered")
+            return ""
+        return expr
+
+    async def query(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        diagram_type: Optional[str] = None,
+        section: Optional[str] = None,
+    ) -> List[Tuple["Document", float]]:
+        from mcp_server.utils.embedding_model import normalize_query
+
+        await self._ready()
+        k = k or env.SEARCH_K
+        expr = self._filter(diagram_type, section)
+        key = (normalize_query(query), k, expr)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached[1]
+
+        query_embedding = None
+        if env.RESULT_CACHE_SIMILARITY_THRESHOLD is not None:
+            query_embedding = _unit(await self._embeddings.aembed_query(query))
+            cached = self._find_near_duplicate(query_embedding, k, expr)
+            if cached is not None:
+                return cached
+
+        results = await self._search(query, k, expr, diagram_type, section)
+        self._results.put(key, (query_embedding, results))
+        return results
+
+    async def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        diagram_type: Optional[str] = None,
+        section: Optional[str] = None,
+    ) -> List[Tuple["Document", float]]:
+        """Like `query`, but bypasses the result cache, e.g. to evaluate rankers."""
+        await self._ready()
+        expr = self._filter(diagram_type, section)
+        return await self._search(query, k or env.SEARCH_K, expr, diagram_type, section)
+
+    async def _search(
+        self,
+        query: str,
+        k: int,
+        expr: str,
+        diagram_type: Optional[str],
+        section: Optional[str],
+    ) -> List[Tuple["Document", float]]:
+        results = await self._search_backend(query, k, expr, diagram_type, section)
+        if self._searched_at is None:
+            self._searched_at = time.time()
+        return results
+
+    async def _search_backend(
+        self,
+        query: str,
+        k: int,
+        expr: str,
+        diagram_type: Optional[str],
+        section: Optional[str],
+    ) -> List[Tuple["Document", float]]:
+        fetch_k = max(env.SEARCH_FETCH_K, k)
+        if env.VECTOR_BACKEND == "local":
+            return self._vector_store.search(
+                await self._embeddings.aembed_query(query),
+                query,
+                k=k,
+                ranker=self._ranker.type,
+                ranker_params=self._ranker.params,
+                fetch_k=fetch_k,
+                mask=self._vector_store.filter_mask(diagram_type, section_term(section)) if expr else None,
+            )
+        async with self._pool.acquire() as store:
+            return await store.asimilarity_search_with_score(
+                query,
+                k=k,
+                fetch_k=fetch_k,
+                param=self._search_params(),
+                expr=expr or None,
+                timeout=env.MILVUS_SEARCH_TIMEOUT,
+                ranker_type=self._ranker.type,
+                ranker_params=self._ranker.params,
+            )
+
+    def _search_params(self) -> Optional[List[Dict]]:
+        """The collection's search params with SEARCH_DENSE/SPARSE_PARAMS applied."""
+        if not env.SEARCH_DENSE_PARAMS and not env.SEARCH_SPARSE_PARAMS:
+            return None
+        defaults = self._vector_store.search_params
+        defaults = defaults if isinstance(defaults, list) else [defaults or {}, {}]
+        return [
+            {**default, "params": {**default.get("params", {}), **overrides}}
+            for default, overrides in zip(defaults, [env.SEARCH_DENSE_PARAMS, env.SEARCH_SPARSE_PARAMS])
+        ]
+
+    def _find_near_duplicate(
+        self,
+        query_embedding: "np.ndarray",
+        k: int,
+        expr: str,
+    ) -> Optional[List[Tuple["Document", float]]]:
+        import numpy as np
+
+        best_score, best_results, best_query = -1.0, None, None
+        for (cached_query, cached_k, cached_expr), (embedding, results) in self._results.items():
+            if cached_k != k or cached_expr != expr or embedding is None:
+                continue
+            score = float(np.dot(query_embedding, embedding))
+            if score > best_score:
+                best_score, best_results = score, results
+                best_query = cached_query
+        if best_score >= env.RESULT_CACHE_SIMILARITY_THRESHOLD:
+            _logger.debug(
+                f"Near-duplicate result cache hit ({best_score:.3f}): {best_query}")
+            return best_results
+        return None
+
+    async def _check_collection_version(self):
+        """
+        Drops cached results when the collection was re-ingested, i.e. when
+        the alias was repointed (new collection id) or its properties changed.
+        """
+        now = time.monotonic()
+        if now - self._version_checked_at < env.COLLECTION_VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+
+        try:
+            version = await asyncio.to_thread(self._describe_version)
+        except Exception as e:
+            _logger.warning(f"Failed to check collection version: {e}")
+            return
+        if self._collection_version is not None and version != self._collection_version:
+            _logger.info("Collection changed, clearing search result cache")
+            self._results.clear()
+            # The new version may have a different schema
+            previous = self._pool
+            await asyncio.to_thread(self.init)
+            if previous is not None:
+                task = asyncio.create_task(previous.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        self._collection_version = version
+
+    def _describe_version(self) -> Optional[str]:
+        if env.VECTOR_BACKEND == "local":
+            # Repointed by the doc-scraper after exporting a new snapshot
+            return self._vector_store.current_version(env.LOCAL_INDEX_DIR)
+        description = self._vector_store.client.describe_collection(
+            self._vector_store.collection_name)
+        return json.dumps(
+            [description.get("collection_id"), description.get("properties", {})],
+            sort_keys=True,
+            default=str,
         )
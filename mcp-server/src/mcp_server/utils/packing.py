@@ -0,0 +1,128 @@
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from langchain_community.docstore.document import Document
+
+# Blocks of a page are joined by a blank line, see the doc-scraper's chunker
+_SEPARATOR = "\n\n"
+
+
+class _Passage(NamedTuple):
+    source: str
+    title: str
+    section: str
+    # Offsets into the page's text, None when the chunk has no `start_index`
+    start: Optional[int]
+    end: Optional[int]
+    text: str
+    score: float
+    rank: int
+
+
+def _passage(document: "Document", score: float, rank: int) -> _Passage:
+    metadata = document.metadata
+    section = metadata.get("section") or ""
+    text = document.page_content
+    # Chunks start with their section path, which isn't part of the page text
+    if section and text.startswith(section + _SEPARATOR):
+        text = text[len(section) + len(_SEPARATOR):]
+    start = metadata.get("start_index")
+    start = start if isinstance(start, int) and start >= 0 else None
+    return _Passage(
+        source=metadata.get("source", ""),
+        title=metadata.get("title", ""),
+        section=section,
+        start=start,
+        end=start + len(text) if start is not None else None,
+        text=text,
+        score=score,
+        rank=rank,
+    )
+
+
+def _merge(passages: List[_Passage]) -> List[_Passage]:
+    """
+    Merges passages of the same page and section whose spans overlap or are
+    directly adjacent, keeping the best score and rank of the merged ones.
+    """
+    merged: List[_Passage] = []
+    located = sorted(
+        (p for p in passages if p.start is not None),
+        key=lambda p: (p.source, p.section, p.start),
+    )
+    for passage in located:
+        last = merged[-1] if merged else None
+        if (
+            last is None
+            or (last.source, last.section) != (passage.source, passage.section)
+            or passage.start > last.end + len(_SEPARATOR)
+        ):
+            merged.append(passage)
+            continue
+        if passage.end <= last.end:
+            text = last.text
+        elif passage.start >= last.end:
+            text = last.text + _SEPARATOR + passage.text
+        else:
+            text = last.text + passage.text[last.end - passage.start:]
+        merged[-1] = last._replace(
+            end=max(last.end, passage.end),
+            text=text,
+            score=max(last.score, passage.score),
+            rank=min(last.rank, passage.rank),
+        )
+
+    seen = {p.text for p in merged}
+    for passage in passages:
+        if passage.start is None and passage.text not in seen:
+            seen.add(passage.text)
+            merged.append(passage)
+    return sorted(merged, key=lambda p: p.rank)
+
+
+def _trim(text: str, budget: int) -> str:
+    """
+    Cuts `text` to `budget` characters at a block boundary, dropping a code
+    example that would be cut rather than returning half of it.
+    """
+    if len(text) <= budget:
+        return text
+    cut = text.rfind(_SEPARATOR, 0, budget)
+    text = text[:cut] if cut > 0 else text[:budget]
+    if text.count("```") % 2:
+        text = text[:text.rfind("```")].rstrip()
+    return text
+
+
+def pack_results(documents_with_score: List[Tuple["Document", float]], max_chars: int) -> List[Dict]:
+    """
+    Packs search hits into as few characters as possible: overlapping or
+    adjacent chunks of the same page section are merged into one passage, and
+    passages are added in rank order until `max_chars` of content is reached,
+    trimming those that don't fit.
+    """
+    passages = _merge([
+        _passage(document, score, rank)
+        for rank, (document, score) in enumerate(documents_with_score)
+    ])
+    packed = []
+    remaining = max_chars
+    for passage in passages:
+        heading = passage.section + _SEPARATOR if passage.section else ""
+        budget = remaining - len(heading)
+        if budget <= 0:
+            break
+        text = _trim(passage.text, budget)
+        if not text:
+            continue
+        content = heading + text
+        remaining -= len(content)
+        packed.append({
+            "content": content,
+            "source": passage.source,
+            "title": passage.title,
+            "section": passage.section,
+            "score": round(float(passage.score), 4),
+            "truncated": len(text) < len(passage.text),
+        })
+    return packed
@@ -0,0 +1,164 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from mcp_server.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+
+def normalize_mermaid_code(mermaid_code: str) -> str:
+    """
+    Normalizes line endings, trailing whitespace and surrounding blank lines,
+    none of which change how Mermaid parses a diagram.
+    """
+    lines = mermaid_code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+class RenderCache:
+    """
+    Content-addressed cache of render and validation results.
+
+    Entries live in an in-memory LRU bounded by `max_bytes`. When `disk_dir`
+    is set, entries are also written there (bounded by `disk_max_bytes`,
+    evicting least recently used files) so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_max_bytes = disk_max_bytes
+        self._disk_bytes = 0
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(
+                path.stat().st_size for path in self._disk_files())
+            _logger.debug(
+                f"Render cache on disk at {self._disk_dir}: {self._disk_bytes} bytes")
+
+    @staticmethod
+    def key(mermaid_code: str, *parts: str) -> str:
+        digest = hashlib.sha256(
+            normalize_mermaid_code(mermaid_code).encode("utf-8"))
+        for part in parts:
+            digest.update(b"\0" + part.encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "disk_evictions": self._disk_evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self._disk_max_bytes if self._disk_dir else 0,
+        }
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+        value = self._read_disk(key)
+        if value is not None:
+            self._disk_hits += 1
+            self._put_memory(key, value)
+            return value
+
+        self._misses += 1
+        return None
+
+    def put(self, key: str, value: bytes):
+        self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def _put_memory(self, key: str, value: bytes):
+        if len(value) > self._max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = value
+        self._bytes += len(value)
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self._disk_dir / key[:2] / key
+
+    def _disk_files(self):
+        return (path for path in self._disk_dir.glob("*/*") if path.is_file())
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self._disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            value = path.read_bytes()
+            # mtime doubles as the last access time for LRU eviction
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            _logger.warning(f"Failed to read render cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: bytes):
+        if self._disk_dir is None or len(value) > self._disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            previous_size = path.stat().st_size if path.exists() else 0
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _logger.warning(f"Failed to write render cache entry {key}: {e}")
+            return
+        self._disk_bytes += len(value) - previous_size
+        if self._disk_bytes > self._disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = sorted(
+            ((path.stat().st_mtime, path) for path in self._disk_files()),
+            key=lambda item: item[0],
+        )
+        for _, path in files:
+            if self._disk_bytes <= self._disk_max_bytes:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+            self._disk_bytes -= size
+            self._disk_evictions += 1
@@ -0,0 +1,379 @@
+import asyncio
+import base64
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from mcp_server.utils.logger import setup_logger
+from mcp_server.utils.renderer import (
+    RenderError,
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RendererCrashedError,
+    RendererNotFoundError,
+    kill_process_group,
+)
+
+_logger = setup_logger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name("render_worker.mjs")
+
+# Rendered PNG/PDF images come back base64-encoded on a single line
+_STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class RenderWorker:
+    """
+    A warm Node.js + Chromium process (see `render_worker.mjs`) that renders
+    Mermaid diagrams over a line-delimited JSON protocol on stdin/stdout.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self._process = process
+        self._next_id = 0
+        self.jobs = 0
+
+    @classmethod
+    async def spawn(
+        cls,
+        node: str,
+        startup_timeout: float,
+        env: Optional[Dict[str, str]] = None,
+    ) -> "RenderWorker":
+        try:
+            process = await asyncio.create_subprocess_exec(
+                node, str(WORKER_SCRIPT),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                env=env,
+                limit=_STREAM_LIMIT,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            raise RendererNotFoundError(
+                f"Node.js ({node}) is not installed or not available in PATH"
+            )
+
+        worker = cls(process)
+        try:
+            message = await asyncio.wait_for(
+                worker._read_message(),
+                timeout=startup_timeout
+            )
+        except asyncio.TimeoutError:
+            worker.kill()
+            raise RenderTimeoutError("Mermaid renderer failed to start in time")
+        except RenderError:
+            worker.kill()
+            raise
+
+        if not message.get("ready"):
+            worker.kill()
+            raise RendererNotFoundError(
+                message.get("error") or "Mermaid renderer failed to start"
+            )
+        return worker
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def alive(self) -> bool:
+        return self._process.returncode is None
+
+    async def _read_message(self) -> Dict:
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                raise RendererCrashedError("Mermaid renderer exited unexpectedly")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # Ignore stray output from node or chromium
+                continue
+            if isinstance(message, dict):
+                return message
+
+    async def _exchange(self, payload: Dict) -> Dict:
+        self._next_id += 1
+        request_id = self._next_id
+        request = json.dumps({"id": request_id} | payload) + "\n"
+        self._process.stdin.write(request.encode("utf-8"))
+        await self._process.stdin.drain()
+
+        while True:
+            message = await self._read_message()
+            if message.get("id") == request_id:
+                return message
+
+    async def request(self, payload: Dict, timeout: float) -> Dict:
+        try:
+            return await asyncio.wait_for(self._exchange(payload), timeout=timeout)
+        except asyncio.TimeoutError:
+            # The worker is still busy with the request; it can't be reused.
+            self.kill()
+            raise RenderTimeoutError("Mermaid rendering timed out")
+        except (BrokenPipeError, ConnectionResetError):
+            raise RendererCrashedError("Mermaid renderer exited unexpectedly")
+
+    def kill(self):
+        kill_process_group(self._process)
+
+    async def close(self, timeout: float = 5):
+        if not self.alive:
+            return
+        try:
+            self._process.stdin.close()
+            await asyncio.wait_for(self._process.wait(), timeout=timeout)
+        except (asyncio.TimeoutError, OSError):
+            self.kill()
+
+
+class RenderPool:
+    """
+    Pool of warm `RenderWorker`s.
+
+    Callers wait for an idle worker (up to `max_waiters` at a time, each for at
+    most `acquire_timeout` seconds) and are rejected with
+    `RenderPoolBusyError` beyond that. Workers are recycled after
+    `max_jobs_per_worker` renders, replaced when they crash, time out or
+    their caller is cancelled, and idle workers are pinged every
+    `health_check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs_per_worker: int = 200,
+        max_waiters: int = 32,
+        acquire_timeout: float = 10,
+        health_check_interval: float = 30,
+        node: str = "node",
+        startup_timeout: float = 30,
+        worker_env: Optional[Dict[str, str]] = None,
+    ):
+        self._size = size
+        self._max_jobs_per_worker = max_jobs_per_worker
+        self._max_waiters = max_waiters
+        self._acquire_timeout = acquire_timeout
+        self._health_check_interval = health_check_interval
+        self._node = node
+        self._startup_timeout = startup_timeout
+        self._worker_env = worker_env
+
+        self._idle: asyncio.Queue[RenderWorker] = asyncio.Queue()
+        self._workers: Set[RenderWorker] = set()
+        self._spawning = 0
+        self._waiters = 0
+        self._cancelled = 0
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "size": self._size,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize(),
+            "waiting": self._waiters,
+            "cancelled": self._cancelled,
+        }
+
+    async def start(self):
+        if self._started:
+            return
+        async with self._start_lock:
+            if self._started:
+                return
+            _logger.debug(f"Starting {self._size} Mermaid renderer(s)")
+            results = await asyncio.gather(
+                *(self._spawn() for _ in range(self._size)),
+                return_exceptions=True,
+            )
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                for worker in list(self._workers):
+                    await self._retire(worker, healthy=True)
+                raise errors[0]
+            for worker in results:
+                self._idle.put_nowait(worker)
+            self._health_task = asyncio.create_task(self._health_check_loop())
+            self._started = True
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+        for worker in list(self._workers):
+            await self._retire(worker, healthy=True)
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        self._started = False
+
+    @staticmethod
+    def render_job(
+        mermaid_code: str,
+        format: str = "svg",
+        theme: str = "default",
+        background: str = "transparent",
+    ) -> Dict:
+        return {
+            "op": "render",
+            "code": mermaid_code,
+            "format": format,
+            "theme": theme,
+            "background": background,
+        }
+
+    @staticmethod
+    def validate_job(mermaid_code: str) -> Dict:
+        return {"op": "validate", "code": mermaid_code}
+
+    async def render(
+        self,
+        mermaid_code: str,
+        format: str = "svg",
+        theme: str = "default",
+        background: str = "transparent",
+        timeout: float = 8,
+    ) -> bytes:
+        response = await self._request(
+            self.render_job(mermaid_code, format, theme, background),
+            timeout,
+        )
+        self._raise_for_error(response)
+        return base64.b64decode(response["data"])
+
+    async def validate(self, mermaid_code: str, timeout: float = 5) -> None:
+        response = await self._request(self.validate_job(mermaid_code), timeout)
+        self._raise_for_error(response)
+
+    async def run_batch(self, jobs: List[Dict], timeout: float) -> List[Dict]:
+        """
+        Runs several render/validate jobs in a single round trip to one
+        worker. Returns one response per job, each with `ok`, `elapsed_ms`
+        and either `data` (base64, for renders) or `error`.
+        """
+        response = await self._request(
+            {"op": "batch", "jobs": jobs}, timeout, jobs=len(jobs))
+        self._raise_for_error(response)
+        return response["results"]
+
+    @staticmethod
+    def _raise_for_error(response: Dict):
+        if not response.get("ok"):
+            raise RenderError(
+                response.get("error") or "Mermaid renderer failed to render diagram"
+            )
+
+    async def _request(self, payload: Dict, timeout: float, jobs: int = 1) -> Dict:
+        await self.start()
+        worker = await self._acquire()
+        healthy = False
+        try:
+            response = await worker.request(payload, timeout)
+            healthy = True
+        except asyncio.CancelledError:
+            # The worker is still rendering for a caller that's gone, so it's
+            # killed and replaced rather than left busy
+            worker.kill()
+            self._cancelled += jobs
+            raise
+        finally:
+            worker.jobs += jobs
+            self._release(worker, healthy)
+        return response
+
+    async def _acquire(self) -> RenderWorker:
+        if self._idle.empty() and self._waiters >= self._max_waiters:
+            raise RenderPoolBusyError(
+                "All Mermaid renderers are busy, try again later")
+        self._waiters += 1
+        try:
+            return await asyncio.wait_for(
+                self._idle.get(),
+                timeout=self._acquire_timeout
+            )
+        except asyncio.TimeoutError:
+            raise RenderPoolBusyError(
+                f"No Mermaid renderer became available within {self._acquire_timeout}s"
+            )
+        finally:
+            self._waiters -= 1
+
+    def _release(self, worker: RenderWorker, healthy: bool):
+        if healthy and worker.alive and worker.jobs < self._max_jobs_per_worker:
+            self._idle.put_nowait(worker)
+            return
+        if healthy:
+            _logger.debug(
+                f"Recycling Mermaid renderer {worker.pid} after {worker.jobs} jobs")
+        else:
+            _logger.warning(f"Replacing unhealthy Mermaid renderer {worker.pid}")
+        self._run_in_background(self._replace(worker, healthy))
+
+    async def _replace(self, worker: RenderWorker, healthy: bool):
+        await self._retire(worker, healthy)
+        await self._replenish()
+
+    async def _spawn(self) -> RenderWorker:
+        self._spawning += 1
+        try:
+            worker = await RenderWorker.spawn(
+                self._node,
+                self._startup_timeout,
+                env=self._worker_env,
+            )
+        finally:
+            self._spawning -= 1
+        self._workers.add(worker)
+        return worker
+
+    async def _retire(self, worker: RenderWorker, healthy: bool):
+        self._workers.discard(worker)
+        if healthy:
+            await worker.close()
+        else:
+            worker.kill()
+
+    async def _replenish(self):
+        while len(self._workers) + self._spawning < self._size:
+            try:
+                worker = await self._spawn()
+            except RenderError as e:
+                _logger.error(f"Failed to start Mermaid renderer: {e}")
+                return
+            self._idle.put_nowait(worker)
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            try:
+                await self._health_check()
+            except Exception:
+                _logger.exception("Mermaid renderer health check failed")
+
+    async def _health_check(self):
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            healthy = False
+            try:
+                response = await worker.request({"op": "ping"}, timeout=5)
+                healthy = response.get("ok", False)
+            except RenderError as e:
+                _logger.warning(
+                    f"Mermaid renderer {worker.pid} failed health check: {e}")
+            self._release(worker, healthy)
+        await self._replenish()
+
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
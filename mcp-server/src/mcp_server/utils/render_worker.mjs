@@ -0,0 +1,106 @@
+// Long-lived Mermaid renderer used by mcp_server.utils.render_pool.
+//
+// Keeps one Chromium instance warm and renders diagrams through the
+// mermaid-cli library API. Requests arrive as one JSON object per line on
+// stdin and every request gets exactly one JSON line back on stdout:
+//
+//   -> {"id": 1, "op": "render", "code": "graph TD; A-->B", "format": "svg"}
+//   <- {"id": 1, "ok": true, "data": "<base64>"}
+//
+// A "batch" request carries a list of render/validate jobs and answers with
+// one result per job, so many diagrams cost a single round trip.
+//
+// The worker exits (closing the browser) when stdin is closed.
+import { execSync } from 'node:child_process';
+import { readFile } from 'node:fs/promises';
+import { createRequire } from 'node:module';
+import path from 'node:path';
+import readline from 'node:readline';
+import { pathToFileURL } from 'node:url';
+
+const write = (message) => process.stdout.write(`${JSON.stringify(message)}\n`);
+
+async function launch() {
+  // mermaid-cli is installed globally next to `mmdc`, so resolve it from the
+  // global node_modules unless an explicit location is configured.
+  const cliRoot = process.env.MERMAID_CLI_ROOT || execSync('npm root -g').toString().trim();
+  const cliDir = path.join(cliRoot, '@mermaid-js', 'mermaid-cli');
+  const cliRequire = createRequire(path.join(cliDir, 'package.json'));
+
+  const { renderMermaid } = await import(pathToFileURL(path.join(cliDir, 'src', 'index.js')).href);
+  const puppeteer = (await import(pathToFileURL(cliRequire.resolve('puppeteer')).href)).default;
+
+  const puppeteerConfig = process.env.PUPPETEER_CONFIG_FILE
+    ? JSON.parse(await readFile(process.env.PUPPETEER_CONFIG_FILE, 'utf-8'))
+    : {};
+  const browser = await puppeteer.launch({ headless: 'shell', ...puppeteerConfig });
+  return { browser, renderMermaid };
+}
+
+let renderer;
+try {
+  renderer = await launch();
+} catch (e) {
+  write({ ready: false, error: `Mermaid CLI could not be loaded: ${e?.message ?? e}` });
+  process.exit(1);
+}
+const { browser, renderMermaid } = renderer;
+
+async function render({ code, format = 'svg', theme = 'default', background = 'transparent' }) {
+  const { data } = await renderMermaid(browser, code, format, {
+    backgroundColor: background,
+    mermaidConfig: { theme },
+  });
+  return Buffer.from(data).toString('base64');
+}
+
+async function runBatch(jobs) {
+  const results = [];
+  for (const job of jobs) {
+    const started = performance.now();
+    try {
+      if (job.op === 'batch') {
+        throw new Error('Batches cannot be nested');
+      }
+      const result = await handle(job);
+      results.push({ ok: true, ...result, elapsed_ms: performance.now() - started });
+    } catch (e) {
+      results.push({ ok: false, error: String(e?.message ?? e), elapsed_ms: performance.now() - started });
+    }
+  }
+  return results;
+}
+
+async function handle(request) {
+  switch (request.op) {
+    case 'ping':
+      return {};
+    case 'validate':
+      await render({ ...request, format: 'svg' });
+      return {};
+    case 'render':
+      return { data: await render(request) };
+    case 'batch':
+      return { results: await runBatch(request.jobs ?? []) };
+    default:
+      throw new Error(`Unknown op '${request.op}'`);
+  }
+}
+
+write({ ready: true });
+
+const lines = readline.createInterface({ input: process.stdin });
+for await (const line of lines) {
+  if (!line.trim()) {
+    continue;
+  }
+  let request = {};
+  try {
+    request = JSON.parse(line);
+    write({ id: request.id, ok: true, ...(await handle(request)) });
+  } catch (e) {
+    write({ id: request.id, ok: false, error: String(e?.message ?? e) });
+  }
+}
+
+await browser.close();
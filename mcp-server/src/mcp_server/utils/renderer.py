@@ -0,0 +1,123 @@
+import asyncio
+import os
+from pathlib import Path
+import signal
+import tempfile
+from typing import Dict
+from mcp_server.utils.logger import setup_logger
+
+_logger = setup_logger(__name__)
+
+
+class RenderError(Exception):
+    """Raised when Mermaid fails to render a diagram."""
+
+
+class RenderTimeoutError(RenderError):
+    """Raised when rendering does not finish within the allowed time."""
+
+
+class RendererNotFoundError(RenderError):
+    """Raised when the Mermaid renderer is not installed."""
+
+
+class RenderPoolBusyError(RenderError):
+    """Raised when every renderer is busy and the wait queue is full."""
+
+
+class RendererCrashedError(RenderError):
+    """Raised when a renderer process dies while handling a request."""
+
+
+# Errors that say nothing about the diagram itself and must not be cached
+TRANSIENT_RENDER_ERRORS = (
+    RenderTimeoutError,
+    RendererNotFoundError,
+    RenderPoolBusyError,
+    RendererCrashedError,
+)
+
+# Renders abandoned by their caller, see `render_with_cli`
+cli_stats: Dict[str, int] = {"cancelled": 0}
+
+
+def kill_process_group(process: asyncio.subprocess.Process):
+    """
+    Kills a renderer along with the headless browser it launched. The
+    renderer must have been started with `start_new_session=True`, which
+    puts both in a process group of their own.
+    """
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def render_with_cli(
+    mermaid_code: str,
+    format: str = "svg",
+    theme: str = "default",
+    background: str = "transparent",
+    timeout: float = 8,
+) -> bytes:
+    """
+    Render Mermaid diagram by spawning a one-off mermaid-cli (mmdc) process.
+    """
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+
+        input_file = tmpdir / "diagram.mmd"
+        output_file = tmpdir / f"diagram.{format}"
+
+        input_file.write_text(mermaid_code, encoding="utf-8")
+
+        cmd = [
+            "mmdc",
+            "-i", str(input_file),
+            "-o", str(output_file),
+            "--quiet",
+        ]
+
+        # Optional rendering tweaks
+        if theme:
+            cmd.extend(["-t", theme])
+
+        if background != "transparent":
+            cmd.extend(["-b", background])
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            raise RendererNotFoundError(
+                "Mermaid CLI (mmdc) is not installed or not available in PATH"
+            )
+
+        try:
+            _, stderr = await asyncio.wait_for(
+                process.communicate(),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            kill_process_group(process)
+            raise RenderTimeoutError("Mermaid rendering timed out")
+        except asyncio.CancelledError:
+            # The caller is gone, e.g. the MCP client cancelled the tool call
+            kill_process_group(process)
+            cli_stats["cancelled"] += 1
+            raise
+
+        if process.returncode != 0:
+            # Mermaid CLI writes all syntax errors to stderr
+            error_message = stderr.decode("utf-8").strip()
+            raise RenderError(
+                error_message or "Mermaid CLI failed to render diagram")
+
+        return output_file.read_bytes()
@@ -0,0 +1,399 @@
+import difflib
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Diagram headers Mermaid recognizes. A header that isn't one of them but
+# is close to one is taken for a typo; any other, like a `*-beta` type newer
+# than this list, is left to the renderer
+DIAGRAM_TYPES = {
+    "graph", "flowchart", "flowchart-elk", "sequenceDiagram", "classDiagram",
+    "classDiagram-v2", "stateDiagram", "stateDiagram-v2", "erDiagram",
+    "journey", "gantt", "pie", "quadrantChart", "requirementDiagram",
+    "gitGraph", "C4Context", "C4Container", "C4Component", "C4Dynamic",
+    "C4Deployment", "mindmap", "timeline", "zenuml", "sankey", "sankey-beta",
+    "xychart", "xychart-beta", "block", "block-beta", "packet", "packet-beta",
+    "kanban", "architecture", "architecture-beta", "radar-beta", "treemap",
+    "treemap-beta", "info",
+}
+
+# How similar to a known header an unknown one has to be to count as a typo
+_TYPO_CUTOFF = 0.75
+_DIAGRAM_TYPES_LOWER = {header.lower(): header for header in DIAGRAM_TYPES}
+
+# Diagram headers of the grammars checked in depth
+DIAGRAM_GRAMMARS = {
+    "graph": "flowchart",
+    "flowchart": "flowchart",
+    "flowchart-elk": "flowchart",
+    "sequenceDiagram": "sequence",
+    "classDiagram": "class",
+    "classDiagram-v2": "class",
+    "stateDiagram": "state",
+    "stateDiagram-v2": "state",
+}
+
+FLOWCHART_DIRECTIONS = {"TB", "TD", "BT", "RL", "LR", ">", "<", "^", "v"}
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+_FLOWCHART_LINK = re.compile(r"<?(?:-{2,}>?|={2,}>?|-?\.+-?>?|~{3,})")
+_FLOWCHART_LINK_CANDIDATE = re.compile(r"[-=.~<>]{2,}")
+_FLOWCHART_STATEMENTS = {
+    "classDef", "class", "style", "linkStyle", "click", "direction",
+}
+
+_SEQUENCE_ARROW = re.compile(r"(?:<<)?--?>>?-?")
+_SEQUENCE_ARROW_CANDIDATE = re.compile(r"[-<>=]+")
+_SEQUENCE_STATEMENTS = {
+    "participant", "actor", "create", "destroy", "autonumber", "activate",
+    "deactivate", "Note", "note", "links", "link", "properties", "details",
+    "title",
+}
+_SEQUENCE_BLOCKS = {"loop", "alt", "opt", "par", "par_over", "critical", "break", "rect", "box"}
+_SEQUENCE_BRANCHES = {"else": {"alt"}, "and": {"par", "par_over"}, "option": {"critical"}}
+
+_CLASS_RELATION = re.compile(r"(?:<\||<|\*)?(?:--|\.\.)(?:\|>|>|\*)?")
+_CLASS_RELATION_CANDIDATE = re.compile(r"[-.<>|*=]{2,}")
+_CLASS_STATEMENTS = {
+    "classDef", "cssClass", "style", "click", "callback", "link", "direction",
+    "note",
+}
+
+_STATE_TRANSITION_CANDIDATE = re.compile(r"[-=<>]{2,}")
+_STATE_STATEMENTS = {"classDef", "class", "direction", "style", "scale", "hide"}
+
+# `<<interface>>`, `<<fork>>` and friends
+_ANNOTATION = re.compile(r"<<[^<>]*>>")
+
+
+def _strip_label(text: str) -> str:
+    """Drops a trailing `: label`, ignoring colons inside quotes or brackets."""
+    depth = 0
+    quoted = False
+    for index, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char in _OPENERS:
+            depth += 1
+        elif char in _CLOSERS:
+            depth -= 1
+        elif char == ":" and depth <= 0:
+            return text[:index]
+    return text
+
+
+class SyntaxIssue(NamedTuple):
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Syntax error on line {self.line}, column {self.column}: {self.message}"
+
+
+class MermaidSyntaxChecker:
+    """
+    Incremental, line-at-a-time syntax checker for Mermaid diagrams.
+
+    It catches the common mistakes without a browser: a missing or misspelled
+    diagram header and, in flowchart, sequence, class and state diagrams,
+    unbalanced brackets, quotes or `subgraph`/`end` style blocks and invalid
+    arrows. Other diagram types are not checked beyond their header. It is
+    deliberately conservative: passing the check does not mean Mermaid will
+    accept the diagram, only that it is worth handing to the real renderer.
+
+    Feed lines with `feed()` and call `close()` at the end of input; checking
+    stops at the first issue, like Mermaid's own parser.
+    """
+
+    def __init__(self):
+        self.issue: Optional[SyntaxIssue] = None
+        self.diagram_type: Optional[str] = None
+        self._grammar: Optional[str] = None
+        self._line_no = 0
+        self._started = False
+        self._in_front_matter = False
+        self._in_acc_descr = False
+        self._in_note = False
+        self._quote: Optional[Tuple[int, int]] = None
+        self._brackets: List[Tuple[str, int, int]] = []
+        self._blocks: List[Tuple[str, int, int]] = []
+
+    def feed(self, line: str) -> Optional[SyntaxIssue]:
+        self._line_no += 1
+        if self.issue is None:
+            self._feed(line.rstrip("\r\n"))
+        return self.issue
+
+    def close(self) -> Optional[SyntaxIssue]:
+        if self.issue is not None:
+            return self.issue
+        if self.diagram_type is None:
+            self._fail(max(self._line_no, 1), 1, "Missing diagram type")
+        elif self._quote is not None:
+            self._fail(*self._quote, "Unclosed '\"'")
+        elif self._brackets:
+            char, line, column = self._brackets[-1]
+            self._fail(line, column, f"Unclosed '{char}'")
+        elif self._blocks:
+            keyword, line, column = self._blocks[-1]
+            self._fail(line, column, f"'{keyword}' is missing its 'end'")
+        return self.issue
+
+    def _fail(self, line: int, column: int, message: str):
+        if self.issue is None:
+            self.issue = SyntaxIssue(line, column, message)
+
+    def _feed(self, line: str):
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+
+        if self._in_front_matter:
+            if stripped == "---":
+                self._in_front_matter = False
+            return
+        if not self._started and stripped == "---":
+            self._started = True
+            self._in_front_matter = True
+            return
+        if not stripped:
+            return
+        self._started = True
+        # Comments and `%%{init: ...}%%` directives
+        if stripped.startswith("%%"):
+            return
+
+        if self.diagram_type is None:
+            self._feed_header(line, stripped, indent)
+            return
+        if self._grammar is None:
+            return
+
+        if self._in_acc_descr:
+            if "}" in stripped:
+                self._in_acc_descr = False
+            return
+        if stripped.startswith(("accTitle", "accDescr")):
+            self._in_acc_descr = "{" in stripped and "}" not in stripped
+            return
+
+        if self._grammar == "flowchart":
+            self._feed_flowchart(line, indent)
+        elif self._grammar == "sequence":
+            self._feed_sequence(line, stripped, indent)
+        elif self._grammar == "class":
+            self._feed_class(line, stripped, indent)
+        elif self._grammar == "state":
+            self._feed_state(line, stripped, indent)
+
+    def _feed_header(self, line: str, stripped: str, indent: int):
+        tokens = stripped.replace(";", " ").split()
+        # `gitGraph:` is accepted too
+        header = tokens[0].rstrip(":") or tokens[0]
+        if header not in DIAGRAM_TYPES and not header.endswith("-beta"):
+            typo = difflib.get_close_matches(header.lower(), _DIAGRAM_TYPES_LOWER, n=1, cutoff=_TYPO_CUTOFF)
+            if typo:
+                self._fail(self._line_no, indent + 1,
+                           f"Unknown diagram type '{header}', did you mean '{_DIAGRAM_TYPES_LOWER[typo[0]]}'?")
+                return
+        self.diagram_type = header
+        self._grammar = DIAGRAM_GRAMMARS.get(header)
+
+        if self._grammar != "flowchart" or len(tokens) < 2:
+            return
+        direction = tokens[1]
+        column = line.index(direction, indent + len(header)) + 1
+        if direction not in FLOWCHART_DIRECTIONS:
+            self._fail(self._line_no, column,
+                       f"Invalid flowchart direction '{direction}'")
+            return
+        # `graph TD; A-->B` keeps statements on the header line
+        rest = column - 1 + len(direction)
+        rest += len(line[rest:]) - len(line[rest:].lstrip(" ;"))
+        self._feed_flowchart(line, rest)
+
+    def _scan(self, text: str, offset: int, multiline: str = "", flowchart: bool = False) -> str:
+        """
+        Tracks quotes and brackets in `text` (which starts at column
+        `offset + 1`) and returns it with quoted and bracketed content blanked
+        out, leaving only the top-level tokens.
+        """
+        masked = []
+        opened_here = len(self._brackets)
+        pipe_column: Optional[int] = None
+
+        for index, char in enumerate(text):
+            column = offset + index + 1
+            if self._quote is not None:
+                if char == '"':
+                    self._quote = None
+                masked.append(" ")
+                continue
+            if char == '"':
+                self._quote = (self._line_no, column)
+                masked.append(" ")
+                continue
+            if pipe_column is not None:
+                if char == "|":
+                    pipe_column = None
+                masked.append(" ")
+                continue
+            if flowchart and char == "|" and not self._brackets:
+                pipe_column = column
+                masked.append(" ")
+                continue
+
+            if char in _OPENERS:
+                self._brackets.append((char, self._line_no, column))
+            elif char in _CLOSERS:
+                if not self._brackets:
+                    self._fail(self._line_no, column, f"Unexpected '{char}'")
+                    break
+                opener, line, opener_column = self._brackets[-1]
+                if opener != _CLOSERS[char] and not (opener == ">" and char == "]"):
+                    self._fail(
+                        self._line_no, column,
+                        f"'{char}' does not match '{opener}' opened at line {line}, column {opener_column}"
+                    )
+                    break
+                self._brackets.pop()
+                opened_here = min(opened_here, len(self._brackets))
+            elif (
+                flowchart and char == ">" and not self._brackets
+                and index > 0 and (text[index - 1].isalnum() or text[index - 1] == "_")
+            ):
+                # Asymmetric flowchart node: `A>label]`
+                self._brackets.append((char, self._line_no, column))
+            elif not self._brackets:
+                masked.append(char)
+                continue
+            masked.append(" ")
+
+        if self.issue is not None:
+            return "".join(masked)
+        if pipe_column is not None:
+            self._fail(self._line_no, pipe_column, "Unclosed '|'")
+        if self._quote is not None:
+            # Markdown strings may continue on the next line
+            return "".join(masked)
+        for char, line, column in self._brackets[opened_here:]:
+            if char not in multiline:
+                self._fail(line, column, f"Unclosed '{char}'")
+                break
+        return "".join(masked)
+
+    def _check_arrows(self, masked: str, offset: int, candidate: re.Pattern, valid: re.Pattern):
+        for match in candidate.finditer(masked):
+            token = match.group()
+            if not valid.fullmatch(token):
+                self._fail(self._line_no, offset + match.start() + 1,
+                           f"Invalid arrow '{token}'")
+                return
+
+    def _open_block(self, keyword: str, indent: int):
+        self._blocks.append((keyword, self._line_no, indent + 1))
+
+    def _close_block(self, indent: int, opener: str):
+        if not self._blocks:
+            self._fail(self._line_no, indent + 1,
+                       f"'end' without a matching '{opener}'")
+            return
+        self._blocks.pop()
+
+    def _feed_flowchart(self, line: str, indent: int):
+        statement = line[indent:].replace(";", " ").split()
+        keyword = statement[0] if statement else ""
+        if keyword == "end":
+            self._close_block(indent, "subgraph")
+            return
+        if keyword == "subgraph":
+            self._open_block(keyword, indent)
+            self._scan(line[indent + len(keyword):], indent + len(keyword))
+            return
+        if keyword in _FLOWCHART_STATEMENTS:
+            return
+        masked = self._scan(line[indent:], indent, multiline="{", flowchart=True)
+        if self.issue is None:
+            self._check_arrows(masked, indent, _FLOWCHART_LINK_CANDIDATE, _FLOWCHART_LINK)
+
+    def _feed_sequence(self, line: str, stripped: str, indent: int):
+        keyword = stripped.split()[0]
+        if keyword == "end":
+            self._close_block(indent, "loop/alt/opt/par/critical/break/rect/box")
+            return
+        if keyword in _SEQUENCE_BLOCKS:
+            self._open_block(keyword, indent)
+            if keyword in {"rect", "box"}:
+                self._scan(line[indent:], indent)
+            return
+        if keyword in _SEQUENCE_BRANCHES:
+            if not self._blocks or self._blocks[-1][0] not in _SEQUENCE_BRANCHES[keyword]:
+                self._fail(self._line_no, indent + 1,
+                           f"'{keyword}' outside of '{'/'.join(sorted(_SEQUENCE_BRANCHES[keyword]))}'")
+            return
+        if keyword in _SEQUENCE_STATEMENTS or keyword.startswith("title:"):
+            return
+
+        # Message text after `:` is free-form
+        message = line[indent:].split(":", 1)[0]
+        for match in _SEQUENCE_ARROW_CANDIDATE.finditer(message):
+            token = match.group()
+            if set(token) <= {"-"}:
+                # Plain dashes belong to actor names or `-x` / `-)` arrows
+                continue
+            if not _SEQUENCE_ARROW.fullmatch(token):
+                self._fail(self._line_no, indent + match.start() + 1,
+                           f"Invalid arrow '{token}'")
+                return
+
+    def _feed_class(self, line: str, stripped: str, indent: int):
+        keyword = stripped.split()[0]
+        if keyword in _CLASS_STATEMENTS:
+            return
+        in_body = any(char == "{" for char, _, _ in self._brackets)
+        text = _ANNOTATION.sub(lambda m: " " * len(m.group()), line[indent:])
+        if not in_body:
+            # Relationship labels and `Class : member` lines end in free text
+            text = _strip_label(text)
+        masked = self._scan(text, indent, multiline="{")
+        if self.issue is None and not in_body:
+            self._check_arrows(masked, indent, _CLASS_RELATION_CANDIDATE, _CLASS_RELATION)
+
+    def _feed_state(self, line: str, stripped: str, indent: int):
+        if self._in_note:
+            if stripped.replace(" ", "") == "endnote":
+                self._in_note = False
+            return
+        keyword = stripped.split()[0]
+        if keyword == "note":
+            self._in_note = ":" not in stripped
+            return
+        if keyword in _STATE_STATEMENTS or stripped == "--":
+            return
+        text = _ANNOTATION.sub(lambda m: " " * len(m.group()), line[indent:])
+        # Transition and state descriptions after `:` are free text
+        masked = self._scan(_strip_label(text), indent, multiline="{")
+        if self.issue is not None:
+            return
+        for match in _STATE_TRANSITION_CANDIDATE.finditer(masked):
+            if match.group() != "-->":
+                self._fail(self._line_no, indent + match.start() + 1,
+                           f"Invalid arrow '{match.group()}'")
+                return
+
+
+def check_mermaid_syntax(lines: Iterable[str]) -> Optional[SyntaxIssue]:
+    """
+    Returns the first syntax issue in a Mermaid diagram, or None when it
+    looks well formed. Accepts the diagram source or an iterable of lines.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    checker = MermaidSyntaxChecker()
+    for line in lines:
+        if checker.feed(line) is not None:
+            break
+    return checker.close()
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries also expire `ttl_seconds` after insertion.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+        }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._entries[key]
+        self._misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        if self._max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Yields live entries without counting them as hits."""
+        now = time.monotonic()
+        for key, (expires_at, value) in list(self._entries.items()):
+            if expires_at > now:
+                yield key, value
+
+    def clear(self):
+        self._entries.clear()